@@ -7,7 +7,7 @@ import os, sys
 sys.path.insert(0, os.path.dirname(__file__))
 
 from config.settings import load_settings
-from db.database import init_db, SessionLocal
+from db.database import init_db, SessionLocal, tenancy_enabled, tenants, company_name
 from db import crud
 from utils import auth
 
@@ -20,7 +20,14 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-init_db()
+
+@st.cache_resource
+def _init_db_once():
+    init_db()
+
+
+_init_db_once()
+auth.activate_tenant()
 
 with open("app/assets/styles.css", "r", encoding="utf-8") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
@@ -28,15 +35,18 @@ with open("app/assets/styles.css", "r", encoding="utf-8") as f:
 
 def render_login():
     st.title("Remote Workforce Attendance and Productivity Monitor")
-    st.caption(settings.company_name)
+    st.caption(company_name())
 
     st.subheader("Login")
+    tenant = None
+    if tenancy_enabled():
+        tenant = st.selectbox("Company", tenants(), format_func=lambda t: settings.tenants[t].get("company_name", t))
     role = st.radio("Role", ["employee", "admin"], horizontal=True)
     email = st.text_input("Email")
     admin_code = st.text_input("Admin Passcode", type="password") if role == "admin" else None
     emp_password = st.text_input("Password", type="password") if role == "employee" else None
     if st.button("Login", type="primary"):
-        ok = auth.login(email=email, role=role, passcode=admin_code, password=emp_password)
+        ok = auth.login(email=email, role=role, passcode=admin_code, password=emp_password, tenant=tenant)
         if not ok:
             st.error("Login failed. Check email or passcode.")
         else:
@@ -0,0 +1 @@
+# Make api a package
@@ -0,0 +1,270 @@
+"""Lightweight async JSON API for check-ins, tasks and heartbeats.
+
+Runs as its own process next to Streamlit:
+
+    python app/api/server.py            # or: uvicorn api.server:app --app-dir app
+
+Every write goes through the same db.crud functions as the pages, executed via
+``AsyncSession.run_sync`` on an asyncpg connection pool. With tenancy enabled,
+requests name their company in the ``X-Tenant`` header.
+"""
+from __future__ import annotations
+import asyncio
+import os
+from contextlib import asynccontextmanager
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, field_validator
+
+from config.settings import load_settings
+from db import crud
+from db.changes import TRACKED, MAX_BATCH, Watermark, changes_since, deletions_since
+from db.database import get_async_sessionmaker, tenancy_enabled, current_tenant, use_tenant
+from db.filters import AnalyticsFilter
+from db.heartbeats import HeartbeatBuffer
+from utils.helpers import to_local_naive
+
+settings = load_settings()
+# one buffer per tenant (key None when tenancy is off)
+_heartbeats: Dict[Optional[str], HeartbeatBuffer] = {}
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    for buf in list(_heartbeats.values()):
+        await asyncio.to_thread(buf.close)
+
+
+app = FastAPI(title="Workforce Ingestion API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def route_tenant(request: Request, call_next):
+    """Run the request with the tenant from ``X-Tenant`` active (required when tenancy is enabled)."""
+    if not tenancy_enabled() or request.url.path == "/healthz":
+        return await call_next(request)
+    tenant = request.headers.get("x-tenant")
+    if tenant not in settings.tenants:
+        return JSONResponse({"detail": "unknown or missing X-Tenant"}, status_code=400)
+    with use_tenant(tenant):
+        return await call_next(request)
+
+
+async def get_session():
+    """FastAPI dependency yielding an AsyncSession from the shared pool."""
+    async with get_async_sessionmaker()() as session:
+        yield session
+
+
+def require_api_key(x_api_key: Optional[str] = Header(default=None)):
+    if settings.api_key and x_api_key != settings.api_key:
+        raise HTTPException(status_code=401, detail="invalid API key")
+
+
+class _LocalTimes(BaseModel):
+    """Timestamps are stored as naive server-local time; aware ones (e.g. ``...Z``) are converted on input."""
+
+    @field_validator("*", mode="after")
+    @classmethod
+    def _local(cls, v):
+        return to_local_naive(v) if isinstance(v, datetime) else v
+
+
+class CheckEvent(_LocalTimes):
+    employee_id: int
+    when: Optional[datetime] = None
+
+
+class TaskIn(_LocalTimes):
+    employee_id: int
+    task_name: str
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    status: str = "Pending"
+    productivity_score: Optional[float] = None
+
+
+class TaskPatch(_LocalTimes):
+    task_name: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    status: Optional[str] = None
+    productivity_score: Optional[float] = None
+
+
+class BulkUpdate(BaseModel):
+    task_ids: List[int]
+    status: Optional[str] = None
+    productivity_score: Optional[float] = None
+
+
+class BulkDelete(BaseModel):
+    task_ids: List[int]
+
+
+class BulkAssign(_LocalTimes):
+    department_id: int
+    task_name: str
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    status: str = "Pending"
+
+
+class Heartbeat(_LocalTimes):
+    employee_id: int
+    ts: datetime
+    active: bool = True
+
+
+def _attendance_out(att) -> dict:
+    return {
+        "employee_id": att.employee_id,
+        "date": att.date.isoformat(),
+        "check_in": att.check_in.isoformat() if att.check_in else None,
+        "check_out": att.check_out.isoformat() if att.check_out else None,
+        "status": att.status,
+    }
+
+
+def _task_out(t) -> dict:
+    return {
+        "task_id": t.task_id,
+        "employee_id": t.employee_id,
+        "task_name": t.task_name,
+        "start_time": t.start_time.isoformat() if t.start_time else None,
+        "end_time": t.end_time.isoformat() if t.end_time else None,
+        "status": t.status,
+        "productivity_score": t.productivity_score,
+    }
+
+
+api = [Depends(require_api_key)]
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"ok": True}
+
+
+@app.post("/attendance/check-in", dependencies=api)
+async def check_in(ev: CheckEvent, db=Depends(get_session)):
+    att = await db.run_sync(crud.mark_check_in, ev.employee_id, ev.when or datetime.now())
+    if att is None:
+        raise HTTPException(status_code=404, detail="employee not found")
+    return _attendance_out(att)
+
+
+@app.post("/attendance/check-out", dependencies=api)
+async def check_out(ev: CheckEvent, db=Depends(get_session)):
+    att = await db.run_sync(crud.mark_check_out, ev.employee_id, ev.when or datetime.now())
+    if att is None:
+        raise HTTPException(status_code=404, detail="employee not found")
+    return _attendance_out(att)
+
+
+@app.post("/tasks", dependencies=api, status_code=201)
+async def create_task(body: TaskIn, db=Depends(get_session)):
+    if await db.run_sync(crud.unknown_employee_ids, [body.employee_id]):
+        raise HTTPException(status_code=404, detail="employee not found")
+    t = await db.run_sync(
+        crud.create_task, body.employee_id, body.task_name, body.start_time, body.end_time, body.status, body.productivity_score
+    )
+    return _task_out(t)
+
+
+@app.patch("/tasks/{task_id}", dependencies=api)
+async def update_task(task_id: int, body: TaskPatch, db=Depends(get_session)):
+    t = await db.run_sync(lambda s: crud.update_task(s, task_id, **body.model_dump(exclude_none=True)))
+    if t is None:
+        raise HTTPException(status_code=404, detail="task not found")
+    return _task_out(t)
+
+
+@app.post("/tasks/bulk-update", dependencies=api)
+async def bulk_update(body: BulkUpdate, db=Depends(get_session)):
+    n = await db.run_sync(
+        lambda s: crud.bulk_update_tasks(s, task_ids=body.task_ids, status=body.status, productivity_score=body.productivity_score)
+    )
+    return {"updated": n}
+
+
+@app.post("/tasks/bulk-delete", dependencies=api)
+async def bulk_delete(body: BulkDelete, db=Depends(get_session)):
+    n = await db.run_sync(lambda s: crud.bulk_delete_tasks(s, task_ids=body.task_ids))
+    return {"deleted": n}
+
+
+@app.post("/tasks/assign", dependencies=api)
+async def bulk_assign(body: BulkAssign, db=Depends(get_session)):
+    flt = AnalyticsFilter(department_ids=(body.department_id,))
+    n = await db.run_sync(
+        lambda s: crud.assign_task_bulk(s, flt, body.task_name, body.start_time, body.end_time, body.status)
+    )
+    return {"created": n}
+
+
+@app.post("/heartbeats", dependencies=api, status_code=202)
+async def heartbeats(events: List[Heartbeat], db=Depends(get_session)):
+    unknown = await db.run_sync(crud.unknown_employee_ids, {e.employee_id for e in events})
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"unknown employee_id: {', '.join(map(str, unknown))}")
+    tenant = current_tenant()
+    buf = _heartbeats.get(tenant)
+    if buf is None:
+        buf = _heartbeats.setdefault(tenant, HeartbeatBuffer())
+    # the buffer may flush inline (COPY over the sync pool), so keep it off the event loop
+    await asyncio.to_thread(buf.extend, [(e.employee_id, e.ts, e.active) for e in events])
+    return {"accepted": len(events)}
+
+
+def _feed_page(rows: list, watermark: Optional[Watermark], limit: int) -> dict:
+    return {"rows": rows, "next": watermark.encode() if watermark else None, "has_more": len(rows) >= limit}
+
+
+def _watermark(since: Optional[str]) -> Optional[Watermark]:
+    try:
+        return Watermark.decode(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/changes/deletions", dependencies=api)
+async def feed_deletions(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=MAX_BATCH),
+    table: Optional[List[str]] = Query(None),
+    db=Depends(get_session),
+):
+    """Tombstones logged after the ``since`` watermark; pass back ``next`` until ``has_more`` is false."""
+    wm = _watermark(since)
+    rows, wm = await db.run_sync(lambda s: deletions_since(s, wm, limit, table))
+    return _feed_page(rows, wm, limit)
+
+
+@app.get("/changes/{table}", dependencies=api)
+async def feed_changes(
+    table: str,
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=MAX_BATCH),
+    db=Depends(get_session),
+):
+    """Rows of ``table`` inserted or updated after the ``since`` watermark, oldest first."""
+    if table not in TRACKED:
+        raise HTTPException(status_code=404, detail=f"unknown table; one of {', '.join(sorted(TRACKED))}")
+    wm = _watermark(since)
+    rows, wm = await db.run_sync(lambda s: changes_since(s, table, wm, limit))
+    return _feed_page(rows, wm, limit)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8000")))
@@ -1,7 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from pathlib import Path
+from typing import Any, Dict, Tuple
 import toml
 
 
@@ -12,6 +13,22 @@ class Settings:
     workday_start: str
     late_threshold_minutes: int
     company_name: str
+    workdays: Tuple[int, ...] = (1, 2, 3, 4, 5)  # ISO weekdays, Monday = 1
+    password_hash_method: str = "scrypt:32768:8:1"
+    hash_workers: int = 4
+    api_key: str = ""
+    api_pool_size: int = 20
+    partitioning_enabled: bool = False
+    partition_months_ahead: int = 3
+    retention_months: int = 0  # 0 keeps every partition attached
+    archive_dir: str = "archive"
+    # dept_name -> {"workday_start": "HH:MM", "late_threshold_minutes": int, "workdays": [ISO weekdays]}
+    department_schedules: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    multi_tenant: bool = False
+    # tenant key -> {"company_name": str, "schema": str}
+    tenants: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
 
 def _read_toml(path: Path) -> dict:
@@ -28,6 +45,7 @@ def load_settings() -> Settings:
       - DATABASE_URL -> database.url
       - ADMIN_PASSCODE -> auth.admin_passcode
       - COMPANY_NAME -> app.company_name
+      - API_KEY -> api.api_key
     """
     here = Path(__file__).resolve().parent
     cfg = _read_toml(here / "config.toml")
@@ -38,6 +56,11 @@ def load_settings() -> Settings:
     workday_start = cfg.get("app", {}).get("workday_start", "09:00")
     late_threshold = int(cfg.get("app", {}).get("late_threshold_minutes", 15))
     company_name = os.getenv("COMPANY_NAME") or cfg.get("app", {}).get("company_name", "Company")
+    hash_method = cfg.get("auth", {}).get("password_hash_method", "scrypt:32768:8:1")
+    hash_workers = int(cfg.get("auth", {}).get("hash_workers", 4))
+    part = cfg.get("partitioning", {})
+    api = cfg.get("api", {})
+    tenancy = cfg.get("tenancy", {})
 
     return Settings(
         database_url=db_url,
@@ -45,4 +68,18 @@ def load_settings() -> Settings:
         workday_start=workday_start,
         late_threshold_minutes=late_threshold,
         company_name=company_name,
+        workdays=tuple(int(d) for d in cfg.get("app", {}).get("workdays", (1, 2, 3, 4, 5))),
+        password_hash_method=hash_method,
+        hash_workers=hash_workers,
+        api_key=os.getenv("API_KEY") or api.get("api_key", ""),
+        api_pool_size=int(api.get("pool_size", 20)),
+        partitioning_enabled=bool(part.get("enabled", False)),
+        partition_months_ahead=int(part.get("months_ahead", 3)),
+        retention_months=int(part.get("retention_months", 0)),
+        archive_dir=part.get("archive_dir", "archive"),
+        department_schedules=dict(cfg.get("schedules", {})),
+        db_pool_size=int(cfg.get("database", {}).get("pool_size", 10)),
+        db_max_overflow=int(cfg.get("database", {}).get("max_overflow", 10)),
+        multi_tenant=bool(tenancy.get("enabled", False)),
+        tenants=dict(tenancy.get("tenants", {})),
     )
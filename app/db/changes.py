@@ -0,0 +1,137 @@
+"""Row-level change feed for downstream syncs (payroll, BI).
+
+``employees``, ``attendance`` and ``tasks`` carry an ``updated_at`` column
+(declared for them by db.database.Base) set from the database clock on every
+INSERT and UPDATE issued through SQLAlchemy: ORM flushes and Core
+insert()/update() statements alike, so every write path in db.crud is covered.
+Deletes made by db.crud, including rows removed by cascades, are logged to
+``change_tombstones``. Consumers page through both with keyset watermarks, so a
+sync reads only what changed since its previous run.
+
+Feeds stop ``SETTLE`` short of the database's current time. ``updated_at`` is
+the clock when the row is written (``clock_timestamp()`` on PostgreSQL, not the
+transaction start), but the row only becomes visible at commit, so a row whose
+transaction commits more than ``SETTLE`` after writing it can be missed.
+Archiving or dropping partitions is not a deletion and leaves no tombstones.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Table, Column, DateTime, Index, Integer, String, select, func, insert, literal, tuple_,
+)
+from sqlalchemy.orm import Session
+
+from db.database import Base, row_clock
+from db.models import Employee, Attendance, Task
+
+SETTLE = timedelta(seconds=30)
+MAX_BATCH = 10_000
+
+# table name -> (model, primary key column)
+TRACKED = {
+    "employees": (Employee, Employee.employee_id),
+    "attendance": (Attendance, Attendance.attendance_id),
+    "tasks": (Task, Task.task_id),
+}
+# never exported through the feed
+_HIDDEN_COLUMNS = {"password_hash"}
+
+change_tombstones = Table(
+    "change_tombstones",
+    Base.metadata,
+    Column("tombstone_id", Integer, primary_key=True),
+    Column("table_name", String(50), nullable=False),
+    Column("row_id", Integer, nullable=False),
+    Column("deleted_at", DateTime, nullable=False, default=row_clock(), server_default=row_clock()),
+    Index("ix_change_tombstones_deleted", "deleted_at", "tombstone_id"),
+)
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """Position in a feed: the (timestamp, id) of the last row a consumer has seen."""
+    at: datetime
+    row_id: int
+
+    def encode(self) -> str:
+        return f"{self.at.isoformat()}~{self.row_id}"
+
+    @classmethod
+    def decode(cls, token: Optional[str]) -> Optional["Watermark"]:
+        if not token:
+            return None
+        at, _, row_id = token.rpartition("~")
+        try:
+            return cls(datetime.fromisoformat(at), int(row_id))
+        except ValueError:
+            raise ValueError(f"invalid watermark: {token!r}") from None
+
+
+def record_deletions(db: Session, table: str, where: Sequence) -> None:
+    """Log tombstones for the rows of ``table`` matching ``where``.
+
+    Call before the DELETE, in the same transaction, so the log commits or rolls back with it.
+    """
+    _model, pk = TRACKED[table]
+    db.execute(
+        insert(change_tombstones).from_select(["table_name", "row_id"], select(literal(table), pk).where(*where))
+    )
+
+
+def touch(db: Session, table: str, where: Sequence) -> None:
+    """Bump ``updated_at`` on rows the database changed behind SQLAlchemy's back (e.g. ON DELETE SET NULL)."""
+    model, _pk = TRACKED[table]
+    db.execute(model.__table__.update().where(*where).values(updated_at=row_clock()))
+
+
+def _settled(db: Session) -> datetime:
+    return db.execute(select(row_clock())).scalar_one() - SETTLE
+
+
+def _after(db: Session, ts_col, id_col, since: Watermark):
+    """Keyset predicate ``(ts, id) > since`` (a row-value comparison the (ts, id) index can serve)."""
+    at = literal(since.at, DateTime)
+    if db.get_bind().dialect.name == "sqlite":
+        at = func.datetime(at)  # CURRENT_TIMESTAMP text has no fractional seconds
+    return tuple_(ts_col, id_col) > tuple_(at, since.row_id)
+
+
+def changes_since(
+    db: Session, table: str, since: Optional[Watermark] = None, limit: int = 1000
+) -> Tuple[List[Dict], Optional[Watermark]]:
+    """Rows of ``table`` inserted or updated after ``since``, oldest first, at most ``limit``.
+
+    Returns ``(rows, watermark)``; pass the watermark back to get the next batch.
+    A batch shorter than ``limit`` means the consumer has caught up.
+    """
+    model, pk = TRACKED[table]
+    t = model.__table__
+    stmt = select(*(c for c in t.c if c.name not in _HIDDEN_COLUMNS)).where(t.c.updated_at <= _settled(db))
+    if since:
+        stmt = stmt.where(_after(db, t.c.updated_at, pk, since))
+    stmt = stmt.order_by(t.c.updated_at, pk).limit(min(limit, MAX_BATCH))
+    rows = [dict(r._mapping) for r in db.execute(stmt)]
+    if not rows:
+        return rows, since
+    return rows, Watermark(rows[-1]["updated_at"], rows[-1][pk.name])
+
+
+def deletions_since(
+    db: Session, since: Optional[Watermark] = None, limit: int = 1000, tables: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict], Optional[Watermark]]:
+    """Tombstones (table_name, row_id, deleted_at) logged after ``since``; same paging as changes_since."""
+    c = change_tombstones.c
+    stmt = select(c.tombstone_id, c.table_name, c.row_id, c.deleted_at).where(c.deleted_at <= _settled(db))
+    if since:
+        stmt = stmt.where(_after(db, c.deleted_at, c.tombstone_id, since))
+    if tables:
+        stmt = stmt.where(c.table_name.in_(tables))
+    stmt = stmt.order_by(c.deleted_at, c.tombstone_id).limit(min(limit, MAX_BATCH))
+    rows = [dict(r._mapping) for r in db.execute(stmt)]
+    if not rows:
+        return rows, since
+    return rows, Watermark(rows[-1]["deleted_at"], rows[-1]["tombstone_id"])
@@ -1,18 +1,26 @@
 from __future__ import annotations
+from dataclasses import replace
 from datetime import date, datetime, timedelta
-from typing import List, Optional, Tuple, Dict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
-from sqlalchemy import select, func, and_, or_, update, delete
+from sqlalchemy import select, func, and_, or_, insert, update, delete, true, case, literal, cast, extract, union_all, text, Date, Integer
 from sqlalchemy.orm import Session
 
 from config.settings import load_settings
 from db.models import Employee, Department, Attendance, Task
+from db.filters import AnalyticsFilter
+from db.directory import directory
+from db.heartbeats import active_hours
+from db import partitioning, workdays
+from db.changes import record_deletions, touch
 from utils.helpers import (
     compute_status,
-    total_work_hours,
+    late_cutoff,
 )
-from utils.security import hash_password
+from utils.security import hash_password_bounded, hash_passwords
+from utils.utilization import compute_utilization
 
 settings = load_settings()
 
@@ -25,6 +33,42 @@ def list_employees(db: Session, department_id: Optional[int] = None) -> List[Emp
     return list(db.execute(stmt).scalars())
 
 
+@lru_cache(maxsize=None)
+def _has_pg_trgm(bind) -> bool:
+    """Whether pg_trgm is installed (checked once per engine; init_db tolerates failing to create it)."""
+    with bind.connect() as conn:
+        return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def search_employees(db: Session, query: str, limit: int = 20) -> List[Tuple[int, str, str]]:
+    """Type-ahead lookup returning up to ``limit`` ``(employee_id, name, email)`` matches.
+
+    An employee matches when the query (case-insensitive) starts their email or
+    starts a word of their name; the first ``limit`` matches by name are returned.
+    On PostgreSQL with pg_trgm this is served by the trigram GIN indexes created
+    in init_db; otherwise by the in-memory prefix index of db.directory, which
+    applies the same rule.
+    """
+    q = " ".join((query or "").split())
+    if not q:
+        return []
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql" or not _has_pg_trgm(bind):
+        return directory.search(q, limit=limit)
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    stmt = (
+        select(Employee.employee_id, Employee.name, Employee.email)
+        .where(or_(
+            Employee.name.ilike(escaped + "%", escape="\\"),
+            Employee.name.ilike("% " + escaped + "%", escape="\\"),
+            Employee.email.ilike(escaped + "%", escape="\\"),
+        ))
+        .order_by(Employee.name, Employee.employee_id)
+        .limit(limit)
+    )
+    return [tuple(r) for r in db.execute(stmt).all()]
+
+
 def get_employee_by_email(db: Session, email: str) -> Optional[Employee]:
     stmt = select(Employee).where(Employee.email == email)
     return db.execute(stmt).scalar_one_or_none()
@@ -35,16 +79,53 @@ def get_employee(db: Session, employee_id: int) -> Optional[Employee]:
     return db.execute(stmt).scalar_one_or_none()
 
 
+def unknown_employee_ids(db: Session, employee_ids: Iterable[int]) -> List[int]:
+    """The ids in ``employee_ids`` that have no employee row, sorted."""
+    ids = set(employee_ids)
+    if not ids:
+        return []
+    found = db.execute(select(Employee.employee_id).where(Employee.employee_id.in_(ids))).scalars()
+    return sorted(ids.difference(found))
+
+
 def create_employee(db: Session, name: str, email: str, role: str, department_id: Optional[int], join_date: Optional[date], password: Optional[str] = None):
     emp = Employee(name=name, email=email, role=role, department_id=department_id, join_date=join_date)
     if password:
-        emp.password_hash = hash_password(password)
+        emp.password_hash = hash_password_bounded(password)
     db.add(emp)
     db.commit()
     db.refresh(emp)
+    directory.invalidate_employees(emp.employee_id)
     return emp
 
 
+def bulk_create_employees(db: Session, rows: List[Dict], batch_size: int = 500) -> int:
+    """Insert many employees; passwords are hashed across a process pool first.
+
+    ``rows`` are dicts with name, email, role, department_id, join_date and an
+    optional plain-text ``password``. Each batch is one executemany INSERT; all
+    batches commit together, so a failure part-way inserts nothing. Returns the
+    number of employees inserted.
+    """
+    pw_idx = [i for i, r in enumerate(rows) if r.get("password")]
+    hashes = hash_passwords([rows[i]["password"] for i in pw_idx])
+    hashed = dict(zip(pw_idx, hashes))
+    cols = ("name", "email", "role", "department_id", "join_date")
+    payload = [
+        {**{c: r.get(c) for c in cols}, "password_hash": hashed.get(i)}
+        for i, r in enumerate(rows)
+    ]
+    try:
+        for lo in range(0, len(payload), batch_size):
+            db.execute(insert(Employee), payload[lo:lo + batch_size])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    directory.invalidate_employees()
+    return len(payload)
+
+
 def update_employee(db: Session, employee_id: int, **kwargs) -> Optional[Employee]:
     emp = get_employee(db, employee_id)
     if not emp:
@@ -54,9 +135,10 @@ def update_employee(db: Session, employee_id: int, **kwargs) -> Optional[Employe
         if hasattr(emp, k) and v is not None:
             setattr(emp, k, v)
     if password:
-        emp.password_hash = hash_password(password)
+        emp.password_hash = hash_password_bounded(password)
     db.commit()
     db.refresh(emp)
+    directory.invalidate_employees(employee_id)
     return emp
 
 
@@ -64,8 +146,10 @@ def delete_employee(db: Session, employee_id: int) -> bool:
     emp = get_employee(db, employee_id)
     if not emp:
         return False
+    _log_employee_cascade(db, [Employee.employee_id == employee_id])
     db.delete(emp)
     db.commit()
+    directory.invalidate_employees(employee_id)
     return True
 
 
@@ -83,6 +167,7 @@ def create_department(db: Session, dept_name: str, manager_name: Optional[str]):
     db.add(d)
     db.commit()
     db.refresh(d)
+    directory.invalidate_departments()
     return d
 
 
@@ -94,15 +179,33 @@ def update_department(db: Session, dept_id: int, **kwargs) -> Optional[Departmen
         if hasattr(d, k) and v is not None:
             setattr(d, k, v)
     db.commit(); db.refresh(d)
+    directory.invalidate_departments()
     return d
 
 
+def _log_employee_cascade(db: Session, where: List):
+    """Tombstones for the employees matching ``where`` and the attendance/tasks their deletion cascades to."""
+    members = select(Employee.employee_id).where(*where)
+    record_deletions(db, "tasks", [Task.employee_id.in_(members)])
+    record_deletions(db, "attendance", [Attendance.employee_id.in_(members)])
+    record_deletions(db, "employees", where)
+
+
 def delete_department(db: Session, dept_id: int) -> bool:
     d = get_department(db, dept_id)
     if not d:
         return False
+    in_dept = [Employee.department_id == dept_id]
+    fk = next(iter(Employee.__table__.c.department_id.foreign_keys), None)
+    cascades = fk is not None and (fk.ondelete or "").upper() == "CASCADE"
+    if cascades:
+        _log_employee_cascade(db, in_dept)
+    else:
+        touch(db, "employees", in_dept)  # about to lose their department
     db.delete(d)
     db.commit()
+    directory.invalidate_departments()
+    directory.invalidate_employees()  # members may have been cascaded/nulled
     return True
 
 
@@ -119,24 +222,102 @@ def get_or_create_attendance(db: Session, employee_id: int, on_date: date) -> At
     return att
 
 
-def mark_check_in(db: Session, employee_id: int, when: datetime) -> Attendance:
+def _employee_department(db: Session, employee_id: int):
+    """``(employee_id, dept_name)`` row for an existing employee (dept_name None without one), else None.
+
+    Read on the caller's session so the async API stays on its own pool.
+    """
+    return db.execute(
+        select(Employee.employee_id, Department.dept_name)
+        .outerjoin(Department, Department.dept_id == Employee.department_id)
+        .where(Employee.employee_id == employee_id)
+    ).first()
+
+
+def mark_check_in(db: Session, employee_id: int, when: datetime) -> Optional[Attendance]:
+    """Record a check-in; None if the employee does not exist."""
+    emp = _employee_department(db, employee_id)
+    if emp is None:
+        return None
     att = get_or_create_attendance(db, employee_id, when.date())
     if not att.check_in:
         att.check_in = when
-    att.status = compute_status(when.time())
+    att.status = compute_status(when.time(), emp.dept_name)
     db.commit(); db.refresh(att)
     return att
 
 
-def mark_check_out(db: Session, employee_id: int, when: datetime) -> Attendance:
+def mark_check_out(db: Session, employee_id: int, when: datetime) -> Optional[Attendance]:
+    """Record a check-out; None if the employee does not exist."""
+    emp = _employee_department(db, employee_id)
+    if emp is None:
+        return None
     att = get_or_create_attendance(db, employee_id, when.date())
     att.check_out = when
     if not att.status:
-        att.status = compute_status(att.check_in.time() if att.check_in else when.time())
+        att.status = compute_status(att.check_in.time() if att.check_in else when.time(), emp.dept_name)
     db.commit(); db.refresh(att)
     return att
 
 
+def recompute_attendance_status(
+    db: Session,
+    start: date,
+    end: date,
+    chunk_days: int = 7,
+    progress: Optional[Callable[[date, date, int], None]] = None,
+) -> int:
+    """Restate Attendance.status for [start, end] under the current workday rules.
+
+    One set-based UPDATE per ``chunk_days`` window, each committed on its own so
+    row locks are held only briefly; per-department cutoffs come from the
+    ``[schedules]`` config. Only rows whose status actually changes are written.
+    Returns the number of rows updated; ``progress(chunk_start, chunk_end, updated)``
+    is called after each chunk.
+    """
+    if chunk_days < 1:
+        raise ValueError(f"chunk_days must be at least 1, got {chunk_days}")
+
+    def secs(t) -> int:
+        return t.hour * 3600 + t.minute * 60 + t.second
+
+    cutoffs = {
+        dept_id: secs(late_cutoff(name))
+        for name, dept_id in directory.department_options().items()
+        if name in settings.department_schedules
+    }
+    default = secs(late_cutoff())
+    dept_of = select(Employee.department_id).where(Employee.employee_id == Attendance.employee_id).scalar_subquery()
+    cutoff = case(cutoffs, value=dept_of, else_=default) if cutoffs else literal(default)
+    check_in_secs = (
+        func.extract("hour", Attendance.check_in) * 3600
+        + func.extract("minute", Attendance.check_in) * 60
+        + func.extract("second", Attendance.check_in)
+    )
+    new_status = case(
+        (Attendance.check_in.is_(None), "Unknown"),
+        (check_in_secs <= cutoff, "On Time"),
+        else_="Late",
+    )
+    total = 0
+    lo = start
+    while lo <= end:
+        hi = min(lo + timedelta(days=chunk_days - 1), end)
+        stmt = (
+            update(Attendance)
+            .where(Attendance.date >= lo, Attendance.date <= hi, Attendance.status.is_distinct_from(new_status))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        updated = db.execute(stmt).rowcount or 0
+        db.commit()
+        total += updated
+        if progress:
+            progress(lo, hi, updated)
+        lo = hi + timedelta(days=1)
+    return total
+
+
 def list_attendance(
     db: Session,
     employee_id: Optional[int] = None,
@@ -153,17 +334,53 @@ def list_attendance(
     return list(db.execute(stmt).scalars())
 
 
-def working_hours_timeseries(db: Session, employee_id: Optional[int], start: date, end: date) -> pd.DataFrame:
-    records = list_attendance(db, employee_id, start, end)
-    rows = []
-    for r in records:
-        hours = total_work_hours(r.check_in, r.check_out)
-        rows.append({"date": r.date, "employee_id": r.employee_id, "hours": hours})
-    df = pd.DataFrame(rows)
+def working_hours_timeseries(
+    db: Session,
+    employee_id: Optional[int],
+    start: date,
+    end: date,
+    filters: Optional[AnalyticsFilter] = None,
+    source: str = "attendance",
+) -> pd.DataFrame:
+    """Hours per employee per day: check-in to check-out, or ``source="activity"`` for heartbeat active time."""
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end, employee_id=employee_id)
+    if source == "activity":
+        return active_hours(db, start, end, filters=f)
+    stmt = (
+        select(Attendance.date, Attendance.employee_id, Attendance.check_in, Attendance.check_out)
+        .join(Employee, Employee.employee_id == Attendance.employee_id)
+        .where(*f.attendance_clauses())
+        .order_by(Attendance.date)
+    )
+    df = pd.DataFrame(db.execute(stmt).all(), columns=["date", "employee_id", "check_in", "check_out"])
     if df.empty:
         return df
-    df = df.sort_values("date")
-    return df
+    delta = (pd.to_datetime(df["check_out"]) - pd.to_datetime(df["check_in"])).dt.total_seconds() / 3600.0
+    df["hours"] = delta.fillna(0.0).clip(lower=0.0)
+    return df[["date", "employee_id", "hours"]]
+
+
+def task_utilization(
+    db: Session,
+    start: date,
+    end: date,
+    filters: Optional[AnalyticsFilter] = None,
+) -> pd.DataFrame:
+    """Busy, double-booked and idle hours per employee-day (see utils.utilization)."""
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end)
+    tasks_stmt = (
+        select(Task.employee_id, Task.start_time, Task.end_time)
+        .join(Employee, Employee.employee_id == Task.employee_id)
+        .where(*f.task_clauses(), Task.end_time.is_not(None))
+    )
+    att_stmt = (
+        select(Attendance.employee_id, Attendance.date, Attendance.check_in, Attendance.check_out)
+        .join(Employee, Employee.employee_id == Attendance.employee_id)
+        .where(*f.attendance_clauses(), Attendance.check_in.is_not(None), Attendance.check_out.is_not(None))
+    )
+    df_tasks = pd.DataFrame(db.execute(tasks_stmt).all(), columns=["employee_id", "start_time", "end_time"])
+    df_att = pd.DataFrame(db.execute(att_stmt).all(), columns=["employee_id", "date", "check_in", "check_out"])
+    return compute_utilization(df_tasks, df_att)
 
 
 
@@ -186,6 +403,13 @@ def list_tasks(
     return list(db.execute(stmt).scalars())
 
 
+def _task_start(start_time: Optional[datetime]) -> Optional[datetime]:
+    """``start_time`` to store; with partitioning on it is the partition key (NOT NULL), so it defaults to now."""
+    if start_time is None and partitioning.enabled():
+        return datetime.now()
+    return start_time
+
+
 def create_task(
     db: Session,
     employee_id: int,
@@ -198,7 +422,7 @@ def create_task(
     t = Task(
         employee_id=employee_id,
         task_name=task_name,
-        start_time=start_time,
+        start_time=_task_start(start_time),
         end_time=end_time,
         status=status,
         productivity_score=productivity_score,
@@ -223,69 +447,446 @@ def delete_task(db: Session, task_id: int) -> bool:
     t = db.get(Task, task_id)
     if not t:
         return False
+    record_deletions(db, "tasks", [Task.task_id == task_id])
     db.delete(t)
     db.commit()
     return True
 
 
 
-def department_productivity(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+def assign_task_bulk(
+    db: Session,
+    filters: AnalyticsFilter,
+    task_name: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    status: str = "Pending",
+    productivity_score: Optional[float] = None,
+) -> int:
+    """Create the same task for every employee matching ``filters`` (employee fields only).
+
+    A single INSERT ... SELECT; returns the number of tasks created. An empty
+    filter is refused (returns 0) rather than assigning to everyone by accident.
+    """
+    emp_clauses = filters.employee_clauses()
+    if not emp_clauses:
+        return 0
+    src = select(
+        Employee.employee_id,
+        literal(task_name),
+        literal(_task_start(start_time), Task.start_time.type),
+        literal(end_time, Task.end_time.type),
+        literal(status),
+        literal(productivity_score, Task.productivity_score.type),
+    ).where(*emp_clauses)
+    stmt = insert(Task).from_select(
+        ["employee_id", "task_name", "start_time", "end_time", "status", "productivity_score"], src
+    ).returning(Task.task_id)
+    created = len(db.execute(stmt).all())
+    db.commit()
+    return created
+
+
+def _task_targets(task_ids: Optional[List[int]], filters: Optional[AnalyticsFilter]) -> List:
+    clauses = []
+    if task_ids:
+        clauses.append(Task.task_id.in_(task_ids))
+    if filters:
+        clauses.extend(filters.task_row_clauses())
+    return clauses
+
+
+def bulk_update_tasks(
+    db: Session,
+    task_ids: Optional[List[int]] = None,
+    filters: Optional[AnalyticsFilter] = None,
+    **values,
+) -> int:
+    """Set ``values`` (e.g. status, productivity_score) on tasks by id list and/or filter in one UPDATE.
+
+    None values are ignored, matching update_task. Returns the number of tasks updated.
+    """
+    values = {k: v for k, v in values.items() if v is not None and hasattr(Task, k)}
+    where = _task_targets(task_ids, filters)
+    if not values or not where:
+        return 0
+    stmt = update(Task).where(*where).values(**values).returning(Task.task_id).execution_options(synchronize_session=False)
+    updated = len(db.execute(stmt).all())
+    db.commit()
+    return updated
+
+
+def bulk_delete_tasks(
+    db: Session,
+    task_ids: Optional[List[int]] = None,
+    filters: Optional[AnalyticsFilter] = None,
+) -> int:
+    """Delete tasks by id list and/or filter in one DELETE; returns the number deleted."""
+    where = _task_targets(task_ids, filters)
+    if not where:
+        return 0
+    record_deletions(db, "tasks", where)
+    stmt = delete(Task).where(*where).returning(Task.task_id).execution_options(synchronize_session=False)
+    deleted = len(db.execute(stmt).all())
+    db.commit()
+    return deleted
+
+
+
+def department_productivity(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    filters: Optional[AnalyticsFilter] = None,
+) -> pd.DataFrame:
     """Average productivity score by department."""
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end)
     stmt = (
         select(Department.dept_name, func.avg(Task.productivity_score))
         .join(Employee, Employee.department_id == Department.dept_id)
         .join(Task, Task.employee_id == Employee.employee_id)
+        .where(*f.task_clauses())
         .group_by(Department.dept_name)
         .order_by(Department.dept_name)
     )
-    if start:
-        stmt = stmt.where(Task.start_time >= datetime.combine(start, datetime.min.time()))
-    if end:
-        stmt = stmt.where(Task.end_time <= datetime.combine(end, datetime.max.time()))
     rows = db.execute(stmt).all()
     return pd.DataFrame(rows, columns=["department", "avg_productivity"])
 
 
-def top_performers(db: Session, limit: int = 5, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
-    stmt = (
-        select(Employee.name, func.avg(Task.productivity_score).label("avg_score"))
-        .join(Task, Task.employee_id == Employee.employee_id)
-        .group_by(Employee.name)
-        .order_by(func.avg(Task.productivity_score).desc())
-        .limit(limit)
-    )
-    if start:
-        stmt = stmt.where(Task.start_time >= datetime.combine(start, datetime.min.time()))
-    if end:
-        stmt = stmt.where(Task.end_time <= datetime.combine(end, datetime.max.time()))
-    rows = db.execute(stmt).all()
-    return pd.DataFrame(rows, columns=["employee", "avg_score"])
+def top_performers(
+    db: Session,
+    limit: int = 5,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    filters: Optional[AnalyticsFilter] = None,
+) -> pd.DataFrame:
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end)
+    df = leaderboard(db, filters=f, limit=limit, compare_previous=False)
+    return df[["name", "avg_score"]].rename(columns={"name": "employee"})
 
 
-def attendance_summary(db: Session, start: date, end: date, department_id: Optional[int] = None) -> pd.DataFrame:
+def leaderboard(
+    db: Session,
+    filters: Optional[AnalyticsFilter] = None,
+    limit: Optional[int] = None,
+    per_department: Optional[int] = None,
+    min_tasks: int = 1,
+    compare_previous: bool = True,
+) -> pd.DataFrame:
+    """Employees ranked by average productivity, grouped by employee_id.
+
+    One statement: per-employee aggregates, then RANK() overall and within the
+    department plus ROW_NUMBER() per department for top-N. When the filter has a
+    date range and ``compare_previous`` is set, the preceding period of equal
+    length is ranked too and ``rank_change`` is positive for employees moving up.
+    """
+    f = filters or AnalyticsFilter()
+
+    def _scores(flt: AnalyticsFilter, name: str):
+        scored = func.count(Task.productivity_score)
+        return (
+            select(Task.employee_id, func.avg(Task.productivity_score).label("avg_score"), scored.label("tasks"))
+            .join(Employee, Employee.employee_id == Task.employee_id)
+            .where(Task.productivity_score.is_not(None), *flt.task_clauses())
+            .group_by(Task.employee_id)
+            .having(scored >= min_tasks)
+            .cte(name)
+        )
+
+    cur = _scores(f, "cur_scores")
+    by_score = cur.c.avg_score.desc()
+    stmt = (
+        select(
+            cur.c.employee_id,
+            Employee.name,
+            Department.dept_name.label("department"),
+            cur.c.tasks,
+            cur.c.avg_score,
+            func.rank().over(order_by=by_score).label("rank"),
+            func.rank().over(partition_by=Employee.department_id, order_by=by_score).label("dept_rank"),
+            func.row_number().over(partition_by=Employee.department_id, order_by=(by_score, cur.c.employee_id)).label("dept_row"),
+        )
+        .select_from(cur)
+        .join(Employee, Employee.employee_id == cur.c.employee_id)
+        .outerjoin(Department, Department.dept_id == Employee.department_id)
+    )
+    with_prev = compare_previous and f.start is not None and f.end is not None
+    if with_prev:
+        span = f.end - f.start + timedelta(days=1)
+        prev_scores = _scores(replace(f, start=f.start - span, end=f.start - timedelta(days=1)), "prev_scores")
+        prev = select(
+            prev_scores.c.employee_id,
+            func.rank().over(order_by=prev_scores.c.avg_score.desc()).label("prev_rank"),
+        ).cte("prev_ranks")
+        stmt = stmt.add_columns(prev.c.prev_rank).outerjoin(prev, prev.c.employee_id == cur.c.employee_id)
+
+    ranked = stmt.subquery("ranked")
+    out = select(ranked)
+    if with_prev:
+        out = out.add_columns((ranked.c.prev_rank - ranked.c.rank).label("rank_change"))
+    if per_department:
+        out = out.where(ranked.c.dept_row <= per_department)
+    out = out.order_by(ranked.c.rank, ranked.c.employee_id)
+    if limit:
+        out = out.limit(limit)
+    res = db.execute(out)
+    df = pd.DataFrame(res.all(), columns=list(res.keys()))
+    df["avg_score"] = df["avg_score"].astype(float)
+    return df.drop(columns=["dept_row"])
+
+
+def attendance_summary(
+    db: Session,
+    start: date,
+    end: date,
+    department_id: Optional[int] = None,
+    filters: Optional[AnalyticsFilter] = None,
+    include_absent: bool = False,
+) -> pd.DataFrame:
+    """Attendance rows; ``include_absent`` reports each missed workday once, as "Absent" (PostgreSQL).
+
+    A missed workday may already have an attendance row without a check-in; that
+    row is replaced by the "Absent" one rather than counted twice.
+    """
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end, department_id=department_id)
     stmt = (
         select(Attendance.employee_id, Attendance.date, Attendance.status)
         .join(Employee, Employee.employee_id == Attendance.employee_id)
-        .where(and_(Attendance.date >= start, Attendance.date <= end))
+        .where(*f.attendance_clauses())
     )
-    if department_id:
-        stmt = stmt.where(Employee.department_id == department_id)
     rows = db.execute(stmt).all()
-    return pd.DataFrame(rows, columns=["employee_id", "date", "status"])
+    df = pd.DataFrame(rows, columns=["employee_id", "date", "status"])
+    if include_absent and workdays.supported(db):
+        absent = workdays.absence_days(db, start, end, filters=f).assign(status="Absent")
+        missed = pd.MultiIndex.from_frame(absent[["employee_id", "date"]])
+        df = df[~pd.MultiIndex.from_frame(df[["employee_id", "date"]]).isin(missed)]
+        df = pd.concat([df, absent], ignore_index=True)
+    return df
 
 
-def daily_average_productivity(db: Session, employee_id: Optional[int], start: date, end: date) -> pd.DataFrame:
+def daily_average_productivity(
+    db: Session,
+    employee_id: Optional[int],
+    start: date,
+    end: date,
+    filters: Optional[AnalyticsFilter] = None,
+) -> pd.DataFrame:
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end, employee_id=employee_id)
+    day = func.date_trunc('day', Task.start_time)
     stmt = (
-        select(func.date_trunc('day', Task.end_time).label("day"), func.avg(Task.productivity_score))
-        .where(Task.productivity_score.is_not(None))
-        .group_by(func.date_trunc('day', Task.end_time))
-        .order_by(func.date_trunc('day', Task.end_time))
+        select(day.label("day"), func.avg(Task.productivity_score))
+        .join(Employee, Employee.employee_id == Task.employee_id)
+        .where(Task.productivity_score.is_not(None), *f.task_clauses())
+        .group_by(day)
+        .order_by(day)
     )
-    if employee_id:
-        stmt = stmt.where(Task.employee_id == employee_id)
-    if start:
-        stmt = stmt.where(Task.end_time >= datetime.combine(start, datetime.min.time()))
-    if end:
-        stmt = stmt.where(Task.end_time <= datetime.combine(end, datetime.max.time()))
     rows = db.execute(stmt).all()
-    return pd.DataFrame(rows, columns=["day", "avg_productivity"])
\ No newline at end of file
+    return pd.DataFrame(rows, columns=["day", "avg_productivity"])
+
+
+ROLLING_LEVELS = ("employee", "department")
+
+
+def productivity_rolling(
+    db: Session,
+    start: date,
+    end: date,
+    filters: Optional[AnalyticsFilter] = None,
+    baseline_days: int = 90,
+    min_baseline_days: int = 5,
+    drop_z: float = -2.0,
+    drop_delta: float = -15.0,
+    gap_z: float = 3.0,
+) -> pd.DataFrame:
+    """Rolling productivity statistics and anomaly flags per employee and per department, per day.
+
+    One statement: daily task scores and check-in/out hours are aggregated at both
+    levels (UNION ALL), then RANGE window frames over the day number give 7/30-day
+    task-weighted rolling means, the previous week's mean, and a baseline (mean and
+    stddev of daily values over the ``baseline_days`` before each day). Rows are
+    returned for days in [start, end]; earlier days are read only to warm the
+    windows, so ``start == end`` refreshes just the latest day.
+
+    ``sudden_drop``: daily z-score <= ``drop_z`` or week-over-week delta <= ``drop_delta``.
+    ``long_gap``: average check-in to check-out hours z-score >= ``gap_z``.
+    Baseline-based flags need ``min_baseline_days`` days of history.
+    """
+    f = filters or AnalyticsFilter()
+    warm = f.narrow(start=start - timedelta(days=max(baseline_days, 30)), end=end)
+    epoch = cast(literal(date(1970, 1, 1)), Date)
+
+    t_day = cast(Task.start_time, Date)
+    score = Task.productivity_score
+    task_levels = []
+    for level, entity in zip(ROLLING_LEVELS, (Task.employee_id, Employee.department_id)):
+        task_levels.append(
+            select(literal(level).label("level"), entity.label("entity_id"), t_day.label("day"),
+                   func.sum(score).label("score_sum"), func.count(score).label("score_n"))
+            .join(Employee, Employee.employee_id == Task.employee_id)
+            .where(score.is_not(None), entity.is_not(None), *warm.task_clauses())
+            .group_by(entity, t_day)
+        )
+    tasks_daily = union_all(*task_levels).cte("tasks_daily")
+
+    hours = extract("epoch", Attendance.check_out - Attendance.check_in) / 3600.0
+    att_levels = []
+    for level, entity in zip(ROLLING_LEVELS, (Attendance.employee_id, Employee.department_id)):
+        att_levels.append(
+            select(literal(level).label("level"), entity.label("entity_id"), Attendance.date.label("day"),
+                   func.avg(hours).label("avg_hours"))
+            .join(Employee, Employee.employee_id == Attendance.employee_id)
+            .where(Attendance.check_in.is_not(None), Attendance.check_out.is_not(None), entity.is_not(None),
+                   *warm.attendance_clauses())
+            .group_by(entity, Attendance.date)
+        )
+    att_daily = union_all(*att_levels).cte("att_daily")
+
+    t, a = tasks_daily.c, att_daily.c
+    day = func.coalesce(t.day, a.day)
+    daily = (
+        select(
+            func.coalesce(t.level, a.level).label("level"),
+            func.coalesce(t.entity_id, a.entity_id).label("entity_id"),
+            day.label("day"),
+            cast(day - epoch, Integer).label("day_no"),
+            t.score_sum,
+            t.score_n,
+            (t.score_sum * 1.0 / func.nullif(t.score_n, 0)).label("avg_score"),
+            a.avg_hours,
+        )
+        .select_from(tasks_daily)
+        .join(att_daily, and_(t.level == a.level, t.entity_id == a.entity_id, t.day == a.day), full=True)
+        .cte("daily")
+    )
+
+    d = daily.c
+
+    def over(expr, lo: int, hi: int):
+        return expr.over(partition_by=(d.level, d.entity_id), order_by=d.day_no, range_=(lo, hi))
+
+    def weighted(lo: int, hi: int):
+        return over(func.sum(d.score_sum), lo, hi) / func.nullif(over(func.sum(d.score_n), lo, hi), 0)
+
+    windowed = select(
+        d.level,
+        d.entity_id,
+        d.day,
+        d.score_n.label("tasks"),
+        d.avg_score,
+        weighted(-6, 0).label("rolling_7"),
+        weighted(-29, 0).label("rolling_30"),
+        weighted(-13, -7).label("prev_7"),
+        over(func.avg(d.avg_score), -baseline_days, -1).label("baseline_mean"),
+        over(func.stddev_samp(d.avg_score), -baseline_days, -1).label("baseline_std"),
+        over(func.count(d.avg_score), -baseline_days, -1).label("baseline_n"),
+        d.avg_hours,
+        over(func.avg(d.avg_hours), -baseline_days, -1).label("hours_mean"),
+        over(func.stddev_samp(d.avg_hours), -baseline_days, -1).label("hours_std"),
+        over(func.count(d.avg_hours), -baseline_days, -1).label("hours_n"),
+    ).subquery("windowed")
+
+    w = windowed.c
+    z_score = (w.avg_score - w.baseline_mean) / func.nullif(w.baseline_std, 0)
+    hours_z = (w.avg_hours - w.hours_mean) / func.nullif(w.hours_std, 0)
+    wow_delta = w.rolling_7 - w.prev_7
+    enough = w.baseline_n >= min_baseline_days
+    stmt = (
+        select(
+            w.level, w.entity_id, w.day, w.tasks, w.avg_score, w.rolling_7, w.rolling_30, w.baseline_mean,
+            z_score.label("z_score"),
+            wow_delta.label("wow_delta"),
+            w.avg_hours,
+            hours_z.label("hours_z"),
+            func.coalesce(or_(and_(enough, z_score <= drop_z), wow_delta <= drop_delta), False).label("sudden_drop"),
+            func.coalesce(and_(w.hours_n >= min_baseline_days, hours_z >= gap_z), False).label("long_gap"),
+        )
+        .where(w.day >= start, w.day <= end)
+        .order_by(w.day, w.level, w.entity_id)
+    )
+    res = db.execute(stmt)
+    df = pd.DataFrame(res.all(), columns=list(res.keys()))
+    numeric = ["avg_score", "rolling_7", "rolling_30", "baseline_mean", "z_score", "wow_delta", "avg_hours", "hours_z"]
+    df[numeric] = df[numeric].astype(float)
+    return df
+
+
+def productivity_anomalies(df_rolling: pd.DataFrame) -> pd.DataFrame:
+    """Rows of a productivity_rolling frame with any anomaly flag set, most recent first."""
+    if df_rolling.empty:
+        return df_rolling
+    flagged = df_rolling[df_rolling["sudden_drop"] | df_rolling["long_gap"]]
+    return flagged.sort_values(["day", "z_score"], ascending=[False, True])
+
+
+def kpi_summary(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    department_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    filters: Optional[AnalyticsFilter] = None,
+) -> Dict[str, Optional[float]]:
+    """Headline KPIs for tasks and attendance in a single aggregate round trip.
+
+    Task counts are bucketed by ``start_time``; attendance metrics by ``date``.
+    With a date range on PostgreSQL, attendance rate is checked-in expected
+    workdays over expected workdays from the workday calendar (holidays,
+    per-department working weeks and join dates), matching
+    workdays.monthly_attendance. Elsewhere it approximates: checked-in days over
+    headcount x Monday-Friday days in the range (or over recorded days when no
+    range is given).
+    """
+    f = (filters or AnalyticsFilter()).narrow(start=start, end=end, department_id=department_id, employee_id=employee_id)
+    task_stmt = select(
+        func.count().label("total_tasks"),
+        func.count().filter(Task.status == "Completed").label("completed_tasks"),
+        func.count().filter(Task.status == "Pending").label("pending_tasks"),
+        func.count().filter(Task.status == "In Progress").label("in_progress_tasks"),
+        func.avg(Task.productivity_score).label("avg_productivity"),
+        func.percentile_cont(0.5).within_group(Task.productivity_score).label("p50_productivity"),
+        func.percentile_cont(0.9).within_group(Task.productivity_score).label("p90_productivity"),
+    ).select_from(Task).join(Employee, Employee.employee_id == Task.employee_id).where(*f.task_clauses())
+
+    hours = func.extract("epoch", Attendance.check_out - Attendance.check_in) / 3600.0
+    att_stmt = select(
+        func.count().label("attendance_rows"),
+        func.count().filter(Attendance.check_in.is_not(None)).label("present_days"),
+        func.count().filter(Attendance.status == "Late").label("late_days"),
+        func.avg(hours).filter(Attendance.check_in.is_not(None), Attendance.check_out.is_not(None)).label("avg_hours"),
+    ).select_from(Attendance).join(Employee, Employee.employee_id == Attendance.employee_id).where(*f.attendance_clauses())
+
+    head_stmt = select(func.count().label("headcount")).select_from(Employee).where(*f.employee_clauses())
+
+    ranged = bool(f.start and f.end and f.end >= f.start)
+    calendar = ranged and workdays.supported(db)
+    parts = [task_stmt.subquery(), att_stmt.subquery(), head_stmt.subquery()]
+    if calendar:
+        parts.append(workdays.workday_totals(f).subquery())
+    joined = parts[0]
+    for sq in parts[1:]:
+        joined = joined.join(sq, true())
+    row = db.execute(select(*parts).select_from(joined)).mappings().one()
+
+    present = row["present_days"] or 0
+    if calendar:
+        attended, expected = row["present_workdays"] or 0, row["workdays"]
+    elif ranged:
+        attended, expected = present, row["headcount"] * len(pd.bdate_range(f.start, f.end))
+    else:
+        attended, expected = present, row["attendance_rows"]
+
+    def _f(v):
+        return float(v) if v is not None else None
+
+    return {
+        "total_tasks": int(row["total_tasks"] or 0),
+        "completed_tasks": int(row["completed_tasks"] or 0),
+        "pending_tasks": int(row["pending_tasks"] or 0),
+        "in_progress_tasks": int(row["in_progress_tasks"] or 0),
+        "avg_productivity": _f(row["avg_productivity"]),
+        "p50_productivity": _f(row["p50_productivity"]),
+        "p90_productivity": _f(row["p90_productivity"]),
+        "attendance_rate": attended / expected if expected else None,
+        "late_rate": (row["late_days"] or 0) / present if present else None,
+        "avg_hours": _f(row["avg_hours"]),
+    }
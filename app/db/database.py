@@ -1,19 +1,164 @@
 from __future__ import annotations
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import contextvars
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+from sqlalchemy import create_engine, event, make_url, DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, mapped_column
+from sqlalchemy.sql.expression import FunctionElement
 from config.settings import load_settings
 from sqlalchemy import inspect, text
 
 
 settings = load_settings()
 
-engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
+
+def _pool_kwargs(url) -> Dict[str, int]:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow}
+
+
+engine = create_engine(settings.database_url, pool_pre_ping=True, future=True, **_pool_kwargs(settings.database_url))
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
+# --- multi-tenancy ---
+#
+# With [tenancy] enabled every tenant (company) lives in its own PostgreSQL
+# schema. The active tenant is a context variable; each pooled connection is
+# pointed at that tenant's schema (search_path) when it is checked out, so all
+# tenants share the one bounded pool and the crud code stays schema-agnostic.
+# Without a tenant the search_path holds only SHARED_SCHEMA, so tenant tables
+# are unreachable rather than silently shared.
+
+SHARED_SCHEMA = "shared"
+_tenant: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("tenant", default=None)
+
+
+def tenancy_enabled() -> bool:
+    return settings.multi_tenant and engine.dialect.name == "postgresql"
+
+
+def tenants() -> List[str]:
+    return sorted(settings.tenants)
+
+
+def tenant_schema(tenant: str) -> str:
+    schema = settings.tenants[tenant].get("schema") or f"tenant_{tenant}"
+    if not re.fullmatch(r"[a-z_][a-z0-9_]{0,62}", schema):
+        raise ValueError(f"invalid schema name for tenant {tenant!r}: {schema!r}")
+    return schema
+
+
+def current_tenant() -> Optional[str]:
+    return _tenant.get()
+
+
+def set_tenant(tenant: Optional[str]):
+    """Make ``tenant`` active for the current thread/task (None clears it)."""
+    if tenant is not None and tenant not in settings.tenants:
+        raise KeyError(f"unknown tenant: {tenant!r}")
+    _tenant.set(tenant)
+
+
+@contextmanager
+def use_tenant(tenant: Optional[str]) -> Iterator[None]:
+    if tenant is not None and tenant not in settings.tenants:
+        raise KeyError(f"unknown tenant: {tenant!r}")
+    token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def company_name() -> str:
+    tenant = current_tenant()
+    if tenant is not None:
+        return settings.tenants[tenant].get("company_name", tenant)
+    return settings.company_name
+
+
+def _route_connection(dbapi_conn, record, _proxy):
+    """Pool checkout hook: point the connection at the active tenant's schema (skipped if already there)."""
+    tenant = current_tenant()
+    path = f'"{tenant_schema(tenant)}", {SHARED_SCHEMA}' if tenant else SHARED_SCHEMA
+    if record.info.get("search_path") == path:
+        return
+    cur = dbapi_conn.cursor()
+    cur.execute(f"SET search_path TO {path}")
+    cur.close()
+    dbapi_conn.commit()  # a later rollback must not undo the SET
+    record.info["search_path"] = path
+
+
+if tenancy_enabled():
+    event.listen(engine, "checkout", _route_connection)
+
+
+T = TypeVar("T")
+
+
+class TenantLocal(Generic[T]):
+    """One ``factory()`` instance per tenant, chosen by the active tenant on each attribute access.
+
+    Lets process-wide caches (e.g. db.directory.directory) stay module singletons
+    while keeping each tenant's data separate.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instances: Dict[Optional[str], T] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        tenant = current_tenant()
+        inst = self._instances.get(tenant)
+        if inst is None:
+            with self._lock:
+                inst = self._instances.setdefault(tenant, self._factory())
+        return inst
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+class row_clock(FunctionElement):
+    """The database clock when a row is written.
+
+    ``clock_timestamp()`` on PostgreSQL, where ``now()`` is the start of the
+    transaction and can be long before the row is written.
+    """
+    type = DateTime()
+    inherit_cache = True
+    name = "row_clock"
+
+
+@compiles(row_clock)
+def _row_clock(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(row_clock, "postgresql")
+def _row_clock_pg(element, compiler, **kw):
+    return "clock_timestamp()"
+
+
+# tables carrying the change-feed ``updated_at`` column (see db.changes)
+CHANGE_TRACKED_TABLES = ("employees", "attendance", "tasks")
+
+
 class Base(DeclarativeBase):
-    pass
+    def __init_subclass__(cls, **kw):
+        # Declared as the model class is defined, so every mapper has the column whatever is imported first.
+        if cls.__dict__.get("__tablename__") in CHANGE_TRACKED_TABLES and "updated_at" not in cls.__dict__:
+            cls.updated_at = mapped_column(DateTime, default=row_clock(), onupdate=row_clock(), server_default=row_clock())
+        super().__init_subclass__(**kw)
 
 
 def get_db():
@@ -25,15 +170,93 @@ def get_db():
         db.close()
 
 
+_async_sessionmaker = None
+
+
+def get_async_sessionmaker():
+    """Lazily build an asyncpg-backed engine/sessionmaker for the HTTP API.
+
+    Created on first use so the Streamlit app never needs asyncpg installed.
+    Use ``await session.run_sync(crud.fn, ...)`` to reuse the sync crud functions.
+    """
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        url = make_url(settings.database_url)
+        async_driver = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}.get(url.get_backend_name())
+        if async_driver:
+            url = url.set(drivername=async_driver)
+        pool_kw = {} if url.get_backend_name() == "sqlite" else {"pool_size": settings.api_pool_size, "max_overflow": settings.api_pool_size}
+        async_engine = create_async_engine(url, pool_pre_ping=True, **pool_kw)
+        if tenancy_enabled():
+            event.listen(async_engine.sync_engine, "checkout", _route_connection)
+        _async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+def _run_in_own_session(fn: Callable[..., Any]) -> Any:
+    with SessionLocal() as db:
+        return fn(db)
+
+
+def gather_reads(jobs: Dict[str, Callable[..., Any]], max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Run independent read-only crud calls concurrently and collect their results.
+
+    Each job is a callable taking a Session (e.g. ``partial(crud.top_performers, limit=5)``)
+    and gets its own session from the pool, so page latency tracks the slowest query
+    instead of the sum of all of them. Jobs run in a copy of the caller's context, so
+    they see the caller's tenant. Exceptions are re-raised in the caller.
+    """
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs), thread_name_prefix="crud-read") as pool:
+        futures = {
+            key: pool.submit(contextvars.copy_context().run, _run_in_own_session, fn)
+            for key, fn in jobs.items()
+        }
+        return {key: fut.result() for key, fut in futures.items()}
+
+
 def init_db():
+    """Create tables and apply the lightweight migrations; with tenancy, for every tenant in parallel."""
     from db import models  
+    from db import heartbeats, result_store, workdays, changes  # noqa: F401  (register their tables)
+    if not tenancy_enabled():
+        _migrate()
+        return
+    with engine.begin() as conn:  # shared objects first, so tenants never race on them
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SHARED_SCHEMA}"))
+        conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA {SHARED_SCHEMA}"))
+    names = tenants()
+    if not names:
+        return
+    workers = max(1, min(len(names), settings.db_pool_size))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tenant-migrate") as pool:
+        futures = {t: pool.submit(_migrate_tenant, t) for t in names}
+        failed = {t: f.exception() for t, f in futures.items() if f.exception() is not None}
+    if failed:
+        raise RuntimeError("migration failed for tenants: " + ", ".join(f"{t} ({e})" for t, e in failed.items()))
+
+
+def _migrate_tenant(tenant: str):
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{tenant_schema(tenant)}"'))
+    with use_tenant(tenant):
+        _migrate()
+
+
+def _migrate():
     Base.metadata.create_all(bind=engine)
     _ensure_optional_columns()
+    from db.partitioning import ensure_partitioning
+    ensure_partitioning()
+    _ensure_indexes()
+    _ensure_search_indexes()
 
 
 def _ensure_optional_columns():
     """Lightweight migration: add columns if missing.
-    Currently ensures employees.password_hash exists.
+    Ensures employees.password_hash and the change-feed updated_at on employees, attendance and tasks.
     """
     try:
         insp = inspect(engine)
@@ -43,3 +266,63 @@ def _ensure_optional_columns():
                 conn.execute(text('ALTER TABLE employees ADD COLUMN password_hash VARCHAR(255)'))
     except Exception:
         pass
+    for table in CHANGE_TRACKED_TABLES:
+        try:
+            # name -> column default expression as PostgreSQL reports it (information_schema.columns.column_default)
+            cols = {c.get('name'): c.get('default') for c in inspect(engine).get_columns(table)}
+            with engine.begin() as conn:
+                if engine.dialect.name == 'postgresql':
+                    if 'updated_at' not in cols:  # non-volatile default backfills without a table rewrite
+                        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP DEFAULT now()'))
+                    # only when needed: ALTER TABLE takes an ACCESS EXCLUSIVE lock, and this runs on every start
+                    if cols.get('updated_at') != 'clock_timestamp()':
+                        conn.execute(text(f'ALTER TABLE {table} ALTER COLUMN updated_at SET DEFAULT clock_timestamp()'))
+                elif 'updated_at' not in cols:
+                    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP'))
+                    conn.execute(text(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP'))
+        except Exception:
+            pass
+
+
+_ANALYTICS_INDEXES = {
+    "ix_tasks_start_time": "tasks (start_time)",
+    "ix_tasks_employee_start": "tasks (employee_id, start_time)",
+    "ix_attendance_date": "attendance (date)",
+    "ix_attendance_employee_date": "attendance (employee_id, date)",
+    "ix_employees_department": "employees (department_id)",
+    # keyset paging of the change feed (db.changes)
+    "ix_employees_updated": "employees (updated_at, employee_id)",
+    "ix_attendance_updated": "attendance (updated_at, attendance_id)",
+    "ix_tasks_updated": "tasks (updated_at, task_id)",
+}
+
+
+_UNIQUE_INDEXES = {
+    # replaces UNIQUE (holiday_date, department_id), which let NULL (company-wide) duplicates through
+    "uq_holidays_date_department": "holidays (holiday_date, (COALESCE(department_id, 0)))",
+}
+
+
+def _ensure_indexes():
+    """Lightweight migration: indexes backing the AnalyticsFilter clauses in db.filters and the change feed."""
+    for kind, indexes in (("INDEX", _ANALYTICS_INDEXES), ("UNIQUE INDEX", _UNIQUE_INDEXES)):
+        for name, target in indexes.items():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f'CREATE {kind} IF NOT EXISTS {name} ON {target}'))
+            except Exception:
+                pass
+
+
+def _ensure_search_indexes():
+    """Trigram indexes for crud.search_employees (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            if not tenancy_enabled():  # tenants use the copy init_db installs in SHARED_SCHEMA
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_employees_name_trgm ON employees USING gin (name gin_trgm_ops)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS ix_employees_email_trgm ON employees USING gin (email gin_trgm_ops)'))
+    except Exception:
+        pass
@@ -0,0 +1,293 @@
+from __future__ import annotations
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+
+from db.database import SessionLocal, TenantLocal
+from db.models import Employee, Department
+
+# Seconds between checks of the roster signature, and the longest a roster is served without a full reload.
+CHECK_INTERVAL = 2.0
+MAX_AGE = 300.0
+
+# Changes whenever another process (the API, the worker, raw SQL) inserts or deletes employees or
+# departments, or updates employees through SQLAlchemy (which stamps updated_at).
+_SIGNATURE = select(
+    select(func.count()).select_from(Employee).scalar_subquery(),
+    select(func.max(Employee.updated_at)).scalar_subquery(),
+    select(func.count()).select_from(Department).scalar_subquery(),
+    select(func.max(Department.dept_id)).scalar_subquery(),
+)
+
+
+class Directory:
+    """Process-wide cache of the employee/department roster.
+
+    Rows live in parallel arrays/lists (no ORM instances) with id, email and
+    department indexes on top. Writers in db.crud call ``invalidate_employees``
+    / ``invalidate_departments``, which bump the change version; readers refresh
+    lazily, re-reading only the dirty employee ids when possible. Writes made
+    by other processes are picked up by comparing a cheap database-side
+    signature every ``CHECK_INTERVAL`` seconds (a full reload when it moved),
+    and by a full reload at least every ``MAX_AGE`` seconds for edits the
+    signature cannot see, such as a department renamed in raw SQL.
+    """
+
+    __slots__ = (
+        "_lock", "_ids", "_depts", "_names", "_emails", "_roles",
+        "_pos", "_by_email", "_by_dept", "_dept_names",
+        "_version", "_loaded_version", "_dirty", "_full", "_depts_stale",
+        "_prefix", "_prefix_version", "_db_signature", "_next_check", "_loaded_at",
+    )
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = array("q")
+        self._depts = array("q")  # 0 = no department
+        self._names: List[str] = []
+        self._emails: List[str] = []
+        self._roles: List[str] = []
+        self._pos: Dict[int, int] = {}
+        self._by_email: Dict[str, int] = {}
+        self._by_dept: Dict[int, Set[int]] = {}
+        self._dept_names: Dict[int, str] = {}
+        self._version = 0
+        self._loaded_version = -1
+        self._dirty: Set[int] = set()
+        self._full = True
+        self._depts_stale = True
+        self._prefix: List[Tuple[str, int]] = []
+        self._prefix_version = -1
+        self._db_signature: Optional[tuple] = None
+        self._next_check = 0.0
+        self._loaded_at = 0.0
+
+    # --- invalidation (called by db.crud writers) ---
+
+    def invalidate_employees(self, *employee_ids: int):
+        """Mark employees as changed; with no ids the whole roster is reloaded."""
+        with self._lock:
+            self._version += 1
+            if employee_ids:
+                self._dirty.update(employee_ids)
+            else:
+                self._full = True
+
+    def invalidate_departments(self):
+        with self._lock:
+            self._version += 1
+            self._depts_stale = True
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # --- refresh ---
+
+    def _refresh(self):
+        now = time.monotonic()
+        due = now >= self._next_check
+        if self._loaded_version == self._version and not due:
+            return
+        with SessionLocal() as db:
+            if due:
+                signature = tuple(db.execute(_SIGNATURE).one())
+                if signature != self._db_signature or now - self._loaded_at >= MAX_AGE:
+                    self._version += 1
+                    self._full = self._depts_stale = True
+                    self._db_signature = signature
+                    self._loaded_at = now
+                self._next_check = now + CHECK_INTERVAL
+            if self._depts_stale:
+                rows = db.execute(select(Department.dept_id, Department.dept_name)).all()
+                self._dept_names = {d: n for d, n in rows}
+                self._depts_stale = False
+            cols = (Employee.employee_id, Employee.name, Employee.email, Employee.role, Employee.department_id)
+            if self._full:
+                rows = db.execute(select(*cols)).all()
+                self._reset()
+                for row in rows:
+                    self._upsert(*row)
+                self._full = False
+            elif self._dirty:
+                dirty = list(self._dirty)
+                rows = db.execute(select(*cols).where(Employee.employee_id.in_(dirty))).all()
+                found = set()
+                for row in rows:
+                    self._upsert(*row)
+                    found.add(row[0])
+                for emp_id in dirty:
+                    if emp_id not in found:
+                        self._remove(emp_id)
+            self._dirty.clear()
+        self._loaded_version = self._version
+
+    def _reset(self):
+        self._ids = array("q")
+        self._depts = array("q")
+        self._names, self._emails, self._roles = [], [], []
+        self._pos, self._by_email, self._by_dept = {}, {}, {}
+
+    def _upsert(self, emp_id: int, name: str, email: str, role: str, dept_id: Optional[int]):
+        dept = dept_id or 0
+        i = self._pos.get(emp_id)
+        if i is None:
+            i = len(self._ids)
+            self._pos[emp_id] = i
+            self._ids.append(emp_id)
+            self._depts.append(dept)
+            self._names.append(name)
+            self._emails.append(email)
+            self._roles.append(role)
+        else:
+            self._by_email.pop(self._emails[i], None)
+            self._by_dept.get(self._depts[i], set()).discard(emp_id)
+            self._depts[i] = dept
+            self._names[i], self._emails[i], self._roles[i] = name, email, role
+        self._by_email[email] = emp_id
+        self._by_dept.setdefault(dept, set()).add(emp_id)
+
+    def _remove(self, emp_id: int):
+        i = self._pos.pop(emp_id, None)
+        if i is None:
+            return
+        self._by_email.pop(self._emails[i], None)
+        self._by_dept.get(self._depts[i], set()).discard(emp_id)
+        last = len(self._ids) - 1
+        if i != last:
+            # swap the last row into the hole so storage stays dense
+            self._ids[i], self._depts[i] = self._ids[last], self._depts[last]
+            self._names[i], self._emails[i], self._roles[i] = self._names[last], self._emails[last], self._roles[last]
+            self._pos[self._ids[i]] = i
+        self._ids.pop()
+        self._depts.pop()
+        self._names.pop()
+        self._emails.pop()
+        self._roles.pop()
+
+    # --- readers ---
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._ids)
+
+    def employee_ids(self) -> List[int]:
+        with self._lock:
+            self._refresh()
+            return list(self._ids)
+
+    def name(self, employee_id: int) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            i = self._pos.get(employee_id)
+            return self._names[i] if i is not None else None
+
+    def employee_id_for_email(self, email: str) -> Optional[int]:
+        with self._lock:
+            self._refresh()
+            return self._by_email.get(email)
+
+    def record(self, employee_id: int) -> Optional[dict]:
+        with self._lock:
+            self._refresh()
+            i = self._pos.get(employee_id)
+            if i is None:
+                return None
+            return {
+                "employee_id": employee_id,
+                "name": self._names[i],
+                "email": self._emails[i],
+                "role": self._roles[i],
+                "department_id": self._depts[i] or None,
+            }
+
+    def members(self, dept_id: Optional[int]) -> List[int]:
+        with self._lock:
+            self._refresh()
+            return sorted(self._by_dept.get(dept_id or 0, ()))
+
+    def names(self, employee_ids: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        """id -> name map, for all employees or the given ids."""
+        with self._lock:
+            self._refresh()
+            ids = self._pos.keys() if employee_ids is None else employee_ids
+            return {e: self._names[self._pos[e]] for e in ids if e in self._pos}
+
+    def department_names_by_employee(self) -> Dict[int, str]:
+        """employee_id -> department name (employees without a department are omitted)."""
+        with self._lock:
+            self._refresh()
+            return {
+                self._ids[i]: self._dept_names[d]
+                for i, d in enumerate(self._depts)
+                if d in self._dept_names
+            }
+
+    def employee_options(self, department_id: Optional[int] = None) -> Dict[str, int]:
+        """``"name (email)" -> employee_id`` ordered by name, for selectboxes."""
+        with self._lock:
+            self._refresh()
+            idx = range(len(self._ids)) if department_id is None else [self._pos[e] for e in self._by_dept.get(department_id, ())]
+            idx = sorted(idx, key=lambda i: self._names[i])
+            return {f"{self._names[i]} ({self._emails[i]})": self._ids[i] for i in idx}
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, str, str]]:
+        """Prefix search over name words and email; returns ``(employee_id, name, email)``.
+
+        An employee matches when ``query`` starts their email or starts a word of
+        their name (the rule crud.search_employees applies on PostgreSQL); the
+        first ``limit`` matches by name are returned. Backed by a sorted key list
+        (rebuilt when the roster version changes) and bisect, so lookups stay
+        logarithmic in the roster size.
+        """
+        q = " ".join((query or "").lower().split())
+        if not q:
+            return []
+        with self._lock:
+            self._refresh()
+            if self._prefix_version != self._loaded_version:
+                keys = []
+                for i, emp_id in enumerate(self._ids):
+                    for word in self._names[i].lower().split():
+                        keys.append((word, emp_id))
+                    keys.append((self._emails[i].lower(), emp_id))
+                keys.sort()
+                self._prefix = keys
+                self._prefix_version = self._loaded_version
+            # candidates have a key starting with the query's first word; the full query is checked on each
+            head = q.split()[0]
+            hits: Set[int] = set()
+            j = bisect_left(self._prefix, (head, -1))
+            while j < len(self._prefix):
+                key, emp_id = self._prefix[j]
+                if not key.startswith(head):
+                    break
+                j += 1
+                if emp_id in hits:
+                    continue
+                i = self._pos[emp_id]
+                name = self._names[i].lower()
+                if self._emails[i].lower().startswith(q) or name.startswith(q) or " " + q in name:
+                    hits.add(emp_id)
+            top = sorted(hits, key=lambda e: (self._names[self._pos[e]], e))[:limit]
+            return [(e, self._names[self._pos[e]], self._emails[self._pos[e]]) for e in top]
+
+    def department_options(self) -> Dict[str, int]:
+        """``dept_name -> dept_id`` ordered by name."""
+        with self._lock:
+            self._refresh()
+            return {n: d for d, n in sorted(self._dept_names.items(), key=lambda kv: kv[1])}
+
+    def department_name(self, dept_id: Optional[int]) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._dept_names.get(dept_id) if dept_id else None
+
+
+# one roster per tenant (a single instance when tenancy is off)
+directory: Directory = TenantLocal(Directory)  # type: ignore[assignment]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+
+from db.models import Employee, Department, Attendance, Task
+
+
+@dataclass(frozen=True)
+class AnalyticsFilter:
+    """Composable filter spec shared by the analytics functions in db.crud.
+
+    Every field is optional; unset (None) fields add no clause, while an empty
+    id/status tuple matches nothing. Date ranges are inclusive calendar days and
+    compile to half-open ranges on an indexed column: ``Task.start_time`` for
+    tasks and ``Attendance.date`` for attendance.
+    """
+    start: Optional[date] = None
+    end: Optional[date] = None
+    department_ids: Optional[Tuple[int, ...]] = None
+    department_name: Optional[str] = None  # case-insensitive "contains"
+    employee_ids: Optional[Tuple[int, ...]] = None
+    task_status: Optional[Tuple[str, ...]] = None
+    role: Optional[str] = None
+
+    def narrow(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        department_id: Optional[int] = None,
+        employee_id: Optional[int] = None,
+        status: Optional[str] = None,
+    ) -> "AnalyticsFilter":
+        """Return a copy with the given single-value arguments applied on top.
+
+        ``start``/``end`` replace the date range. A department, employee or status
+        is intersected with the existing selection, so a value outside it yields
+        a filter that matches nothing rather than a wider one.
+        """
+        def within(current, value):
+            return (value,) if current is None else tuple(v for v in current if v == value)
+
+        changes = {}
+        if start:
+            changes["start"] = start
+        if end:
+            changes["end"] = end
+        if department_id:
+            changes["department_ids"] = within(self.department_ids, department_id)
+        if employee_id:
+            changes["employee_ids"] = within(self.employee_ids, employee_id)
+        if status:
+            changes["task_status"] = within(self.task_status, status)
+        return replace(self, **changes) if changes else self
+
+    def _start_dt(self) -> Optional[datetime]:
+        return datetime.combine(self.start, datetime.min.time()) if self.start else None
+
+    def _end_dt(self) -> Optional[datetime]:
+        return datetime.combine(self.end + timedelta(days=1), datetime.min.time()) if self.end else None
+
+    def employee_clauses(self, by_id: bool = True) -> List:
+        """Clauses on the Employee entity (callers must have Employee in the FROM).
+
+        ``by_id=False`` leaves out the employee_ids clause, for callers that put it
+        on their own employee_id column instead.
+        """
+        clauses = []
+        if self.department_ids is not None:
+            clauses.append(Employee.department_id.in_(self.department_ids))
+        if self.department_name:
+            clauses.append(Employee.department_id.in_(
+                select(Department.dept_id).where(Department.dept_name.icontains(self.department_name, autoescape=True))
+            ))
+        if by_id and self.employee_ids is not None:
+            clauses.append(Employee.employee_id.in_(self.employee_ids))
+        if self.role:
+            clauses.append(Employee.role == self.role)
+        return clauses
+
+    def task_clauses(self) -> List:
+        """Clauses for queries over Task joined to Employee."""
+        clauses = self.employee_clauses(by_id=False)
+        if self.employee_ids is not None:
+            clauses.append(Task.employee_id.in_(self.employee_ids))
+        if self.task_status is not None:
+            clauses.append(Task.status.in_(self.task_status))
+        if self.start:
+            clauses.append(Task.start_time >= self._start_dt())
+        if self.end:
+            clauses.append(Task.start_time < self._end_dt())
+        return clauses
+
+    def task_row_clauses(self) -> List:
+        """Like task_clauses, but self-contained on Task (for UPDATE/DELETE without a join)."""
+        clauses = []
+        emp = self.employee_clauses(by_id=False)
+        if emp:
+            clauses.append(Task.employee_id.in_(select(Employee.employee_id).where(*emp)))
+        if self.employee_ids is not None:
+            clauses.append(Task.employee_id.in_(self.employee_ids))
+        if self.task_status is not None:
+            clauses.append(Task.status.in_(self.task_status))
+        if self.start:
+            clauses.append(Task.start_time >= self._start_dt())
+        if self.end:
+            clauses.append(Task.start_time < self._end_dt())
+        return clauses
+
+    def attendance_clauses(self) -> List:
+        """Clauses for queries over Attendance joined to Employee."""
+        clauses = self.employee_clauses(by_id=False)
+        if self.employee_ids is not None:
+            clauses.append(Attendance.employee_id.in_(self.employee_ids))
+        if self.start:
+            clauses.append(Attendance.date >= self.start)
+        if self.end:
+            clauses.append(Attendance.date <= self.end)
+        return clauses
@@ -0,0 +1,210 @@
+"""Per-minute activity heartbeats stored as one bitmap row per employee and day.
+
+``activity_days`` holds two 1440-bit strings per (employee_id, day): minutes the
+machine reported in (``online``) and minutes it reported activity (``active``),
+plus the rolled-up minute counts. Ingestion folds a batch of raw events into
+bitmaps with NumPy, COPYs them into a temp table and ORs them into place with a
+single upsert, so cost scales with employee-days per batch, not events.
+"""
+from __future__ import annotations
+import logging
+import threading
+import time
+from datetime import date, datetime
+from io import StringIO
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Table, Column, Date, ForeignKey, Integer, SmallInteger, String, select, exc
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.orm import Session
+
+from db.database import Base, engine, current_tenant, use_tenant
+from db.filters import AnalyticsFilter
+from db.models import Employee
+from utils.helpers import to_local_naive
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 1440
+
+activity_days = Table(
+    "activity_days",
+    Base.metadata,
+    Column("employee_id", Integer, ForeignKey("employees.employee_id", ondelete="CASCADE"), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("online", String(MINUTES_PER_DAY).with_variant(BIT(MINUTES_PER_DAY), "postgresql"), nullable=False),
+    Column("active", String(MINUTES_PER_DAY).with_variant(BIT(MINUTES_PER_DAY), "postgresql"), nullable=False),
+    Column("online_minutes", SmallInteger, nullable=False, default=0),
+    Column("active_minutes", SmallInteger, nullable=False, default=0),
+)
+
+_MERGE_SQL = """
+INSERT INTO activity_days (employee_id, day, online, active, online_minutes, active_minutes)
+SELECT employee_id, day, online, active,
+       length(replace(online::text, '0', '')), length(replace(active::text, '0', ''))
+FROM _hb_stage
+ON CONFLICT (employee_id, day) DO UPDATE SET
+    online = activity_days.online | EXCLUDED.online,
+    active = activity_days.active | EXCLUDED.active,
+    online_minutes = length(replace((activity_days.online | EXCLUDED.online)::text, '0', '')),
+    active_minutes = length(replace((activity_days.active | EXCLUDED.active)::text, '0', ''))
+"""
+
+
+def _bitmaps(events: pd.DataFrame) -> pd.DataFrame:
+    """Fold (employee_id, ts, active) events into per employee-day '0'/'1' bit strings.
+
+    Timestamps are bucketed on the server's local clock; timezone-aware ones are converted to it.
+    """
+    ts = events["ts"]
+    if not pd.api.types.is_datetime64_dtype(ts):  # naive datetime64 is already local
+        ts = ts.map(lambda v: to_local_naive(pd.Timestamp(v).to_pydatetime()))
+    ts = pd.to_datetime(ts)
+    day = ts.dt.normalize()
+    minute = (ts.dt.hour * 60 + ts.dt.minute).to_numpy()
+    group = events.groupby([events["employee_id"].to_numpy(), day.to_numpy()], sort=False).ngroup().to_numpy()
+    n = int(group.max()) + 1
+    online = np.zeros((n, MINUTES_PER_DAY), dtype=np.uint8)
+    active = np.zeros((n, MINUTES_PER_DAY), dtype=np.uint8)
+    online[group, minute] = 1
+    is_active = events["active"].to_numpy(dtype=bool)
+    active[group[is_active], minute[is_active]] = 1
+    first = pd.Series(np.arange(len(group))).groupby(group).first().to_numpy()
+
+    def to_text(bits: np.ndarray) -> List[str]:
+        return [row.decode() for row in np.ascontiguousarray(bits + ord("0")).view(f"S{MINUTES_PER_DAY}").ravel()]
+
+    return pd.DataFrame({
+        "employee_id": events["employee_id"].to_numpy()[first],
+        "day": day.dt.date.to_numpy()[first],
+        "online": to_text(online),
+        "active": to_text(active),
+    })
+
+
+def ingest_heartbeats(events: Iterable[Tuple[int, datetime, bool]]) -> int:
+    """Store a batch of ``(employee_id, ts, active)`` heartbeats (PostgreSQL). Returns rows merged."""
+    df = events if isinstance(events, pd.DataFrame) else pd.DataFrame(list(events), columns=["employee_id", "ts", "active"])
+    if df.empty:
+        return 0
+    rows = _bitmaps(df)
+    buf = StringIO()
+    rows.to_csv(buf, sep="\t", header=False, index=False)
+    buf.seek(0)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(
+            "CREATE TEMP TABLE _hb_stage (employee_id int, day date, online bit(1440), active bit(1440)) ON COMMIT DROP"
+        )
+        cur.copy_expert("COPY _hb_stage (employee_id, day, online, active) FROM STDIN", buf)
+        cur.execute(_MERGE_SQL)
+        raw.commit()
+    finally:
+        raw.close()
+    return len(rows)
+
+
+def _connection_lost(e: Exception) -> bool:
+    """Whether ``e`` is a lost/unavailable connection (worth retrying) rather than a bad batch."""
+    dbapi = engine.dialect.loaded_dbapi
+    return isinstance(e, (exc.OperationalError, exc.InterfaceError, dbapi.OperationalError, dbapi.InterfaceError))
+
+
+class HeartbeatBuffer:
+    """Thread-safe accumulator that flushes to ingest_heartbeats by size or age.
+
+    Producers call ``add``; a daemon thread flushes every ``max_age`` seconds and
+    ``add`` flushes inline once ``max_events`` are pending. Events are written to
+    the tenant that was active when the buffer was created.
+
+    A batch that fails because the database is unreachable is kept for the next
+    flush; one that fails for any other reason is dropped and logged, so a bad
+    event cannot block the buffer. At most ``max_pending`` events are held; past
+    that the oldest are dropped. ``dropped`` counts events lost either way.
+    """
+
+    def __init__(self, max_events: int = 5000, max_age: float = 2.0, max_pending: int = 100_000):
+        self.max_events = max_events
+        self.max_age = max_age
+        self.max_pending = max(max_pending, max_events)
+        self.tenant = current_tenant()
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[int, datetime, bool]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="heartbeat-flush", daemon=True)
+        self._thread.start()
+
+    def add(self, employee_id: int, ts: datetime, active: bool = True):
+        self.extend([(employee_id, ts, active)])
+
+    def extend(self, events: Iterable[Tuple[int, datetime, bool]]):
+        with self._lock:
+            self._pending.extend(events)
+            self._trim()
+            full = len(self._pending) >= self.max_events
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                pass  # kept for the flush thread; producers are not failed for an unreachable database
+
+    def _trim(self):
+        """Drop the oldest pending events beyond ``max_pending`` (caller holds the lock)."""
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.dropped += excess
+            logger.warning("heartbeat buffer full; dropped the %d oldest events", excess)
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            with use_tenant(self.tenant):
+                return ingest_heartbeats(batch)
+        except Exception as e:
+            with self._lock:
+                if _connection_lost(e):
+                    self._pending[:0] = batch  # keep events for the next attempt
+                    self._trim()
+                    raise
+                self.dropped += len(batch)
+            logger.exception("dropped a batch of %d heartbeats that could not be stored", len(batch))
+            return 0
+
+    def _run(self):
+        while not self._stop.wait(self.max_age):
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.max_age)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+def active_hours(db: Session, start: date, end: date, filters: Optional[AnalyticsFilter] = None) -> pd.DataFrame:
+    """Daily active hours per employee from the heartbeat rollups (columns: date, employee_id, hours)."""
+    f = filters or AnalyticsFilter()
+    f = f.narrow(start=start, end=end)
+    stmt = (
+        select(activity_days.c.day, activity_days.c.employee_id, activity_days.c.active_minutes / 60.0)
+        .join(Employee, Employee.employee_id == activity_days.c.employee_id)
+        .where(*f.employee_clauses(by_id=False))
+        .order_by(activity_days.c.day)
+    )
+    if f.employee_ids is not None:
+        stmt = stmt.where(activity_days.c.employee_id.in_(f.employee_ids))
+    if f.start:
+        stmt = stmt.where(activity_days.c.day >= f.start)
+    if f.end:
+        stmt = stmt.where(activity_days.c.day <= f.end)
+    return pd.DataFrame(db.execute(stmt).all(), columns=["date", "employee_id", "hours"])
@@ -0,0 +1,232 @@
+"""Monthly range partitioning for attendance and tasks (PostgreSQL only).
+
+Partitions are named ``<table>_pYYYYmMM`` and cover [first of month, first of
+next month). A ``<table>_default`` partition catches anything outside the
+created range. The partition key is part of the primary key, so once converted
+every task needs a start_time; with partitioning enabled, db.crud stamps tasks
+created without one with the current time. Old partitions can be detached and
+archived to gzip'd CSV files, and restored on demand.
+"""
+from __future__ import annotations
+import gzip
+import logging
+import os
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+
+from db.database import engine, settings, current_tenant
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key column
+PARTITIONED = {"attendance": "date", "tasks": "start_time"}
+
+
+def _month_start(d: date, add: int = 0) -> date:
+    m = d.year * 12 + (d.month - 1) + add
+    return date(m // 12, m % 12 + 1, 1)
+
+
+def _part_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}m{month.month:02d}"
+
+
+def _parse_part_name(table: str, name: str) -> Optional[date]:
+    prefix = f"{table}_p"
+    if not name.startswith(prefix) or len(name) != len(prefix) + 7:
+        return None
+    try:
+        return date(int(name[len(prefix):len(prefix) + 4]), int(name[-2:]), 1)
+    except ValueError:
+        return None
+
+
+def _archive_dir(archive_dir: Optional[str]) -> str:
+    """Archive location; each tenant gets its own subdirectory since partition names repeat across schemas."""
+    base = archive_dir or settings.archive_dir
+    tenant = current_tenant()
+    return os.path.join(base, tenant) if tenant else base
+
+
+def enabled() -> bool:
+    return settings.partitioning_enabled and engine.dialect.name == "postgresql"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+             "WHERE c.relname = :t AND c.relnamespace = to_regnamespace(current_schema())"),
+        {"t": table},
+    ).first())
+
+
+def list_partitions(conn, table: str) -> List[Tuple[str, date]]:
+    rows = conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "JOIN pg_class p ON p.oid = i.inhparent "
+             "WHERE p.relname = :t AND p.relnamespace = to_regnamespace(current_schema())"),
+        {"t": table},
+    ).scalars()
+    parts = [(n, _parse_part_name(table, n)) for n in rows]
+    return sorted((n, m) for n, m in parts if m is not None)
+
+
+def _create_month(conn, table: str, key: str, month: date):
+    """Create one monthly partition, moving any rows the default partition already holds for it."""
+    name = _part_name(table, month)
+    lo, hi = month, _month_start(month, 1)
+    if conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar():
+        return
+    rng = f"{key} >= :lo AND {key} < :hi"
+    conn.execute(text(f"CREATE TEMP TABLE _moved ON COMMIT DROP AS SELECT * FROM {table}_default WHERE {rng}"), {"lo": lo, "hi": hi})
+    conn.execute(text(f"DELETE FROM {table}_default WHERE {rng}"), {"lo": lo, "hi": hi})
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM _moved"))
+    conn.execute(text("DROP TABLE _moved"))
+
+
+def _inbound_foreign_keys(conn, table: str) -> List[str]:
+    return list(conn.execute(
+        text("SELECT conrelid::regclass::text || '.' || conname FROM pg_constraint "
+             "WHERE contype = 'f' AND confrelid = to_regclass(:t) AND conrelid <> confrelid"),
+        {"t": table},
+    ).scalars())
+
+
+def convert_to_partitioned(table: str) -> bool:
+    """One-off migration of an existing heap table to a monthly-partitioned table.
+
+    Runs in one transaction under an exclusive lock; returns False if ``table`` is
+    already partitioned. PostgreSQL requires every unique constraint on a
+    partitioned table to include the partition key, so the primary key becomes
+    ``(id, key)`` and the key column NOT NULL, and other unique constraints get
+    the key appended. Refuses (ValueError) when the key has NULLs or another
+    table has a foreign key into ``table``, since neither survives the move.
+    Secondary indexes are not copied; init_db recreates them.
+    """
+    key = PARTITIONED[table]
+    insp = inspect(engine)
+    pk_cols = insp.get_pk_constraint(table).get("constrained_columns") or []
+    fks = insp.get_foreign_keys(table)
+    uniques = [u["column_names"] for u in insp.get_unique_constraints(table)]
+    with engine.begin() as conn:
+        if is_partitioned(conn, table):
+            return False
+        conn.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+        inbound = _inbound_foreign_keys(conn, table)
+        if inbound:
+            raise ValueError(f"cannot partition {table}: referenced by foreign keys {', '.join(inbound)}")
+        if conn.execute(text(f"SELECT 1 FROM {table} WHERE {key} IS NULL LIMIT 1")).first():
+            raise ValueError(f"cannot partition {table}: some rows have no {key}")
+        conn.execute(text(f"CREATE TABLE {table}__p (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE ({key})"))
+        conn.execute(text(f"ALTER TABLE {table}__p ALTER COLUMN {key} SET NOT NULL"))
+        conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table}__p DEFAULT"))
+        for col in pk_cols:
+            seq = conn.execute(text("SELECT pg_get_serial_sequence(:t, :c)"), {"t": table, "c": col}).scalar()
+            if seq:
+                conn.execute(text(f"ALTER SEQUENCE {seq} OWNED BY {table}__p.{col}"))
+        lo, hi = conn.execute(text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}__legacy"))
+        conn.execute(text(f"ALTER TABLE {table}__p RENAME TO {table}"))
+        if lo is not None:
+            month = _month_start(lo)
+            while month <= _month_start(hi):
+                conn.execute(text(f"CREATE TABLE {_part_name(table, month)} PARTITION OF {table} "
+                                  f"FOR VALUES FROM ('{month}') TO ('{_month_start(month, 1)}')"))
+                month = _month_start(month, 1)
+        conn.execute(text(f"INSERT INTO {table} SELECT * FROM {table}__legacy"))
+        conn.execute(text(f"DROP TABLE {table}__legacy"))
+        if pk_cols:
+            cols = pk_cols + [key] if key not in pk_cols else pk_cols
+            conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({', '.join(cols)})"))
+        for cols in uniques:
+            if key not in cols:
+                logger.warning("%s: unique (%s) now also includes %s; it is enforced per %s value only",
+                               table, ", ".join(cols), key, key)
+                cols = cols + [key]
+            conn.execute(text(f"ALTER TABLE {table} ADD UNIQUE ({', '.join(cols)})"))
+        for fk in fks:
+            ondelete = (fk.get("options") or {}).get("ondelete")
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD FOREIGN KEY ({', '.join(fk['constrained_columns'])}) "
+                f"REFERENCES {fk['referred_table']} ({', '.join(fk['referred_columns'])})"
+                + (f" ON DELETE {ondelete}" if ondelete else "")
+            ))
+    return True
+
+
+def ensure_future_partitions(months_ahead: Optional[int] = None, today: Optional[date] = None):
+    """Create partitions from the current month through ``months_ahead`` months out."""
+    ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    first = _month_start(today or date.today())
+    for table, key in PARTITIONED.items():
+        with engine.begin() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            for i in range(ahead + 1):
+                _create_month(conn, table, key, _month_start(first, i))
+
+
+def archive_old_partitions(retention_months: Optional[int] = None, archive_dir: Optional[str] = None,
+                           today: Optional[date] = None) -> List[str]:
+    """Detach partitions that ended before the retention window and archive them as .csv.gz.
+
+    Each partition is written to disk before it is dropped, so a failure leaves it
+    either attached or detached-but-present. Returns the archived file paths.
+    """
+    keep = settings.retention_months if retention_months is None else retention_months
+    if keep <= 0:
+        return []
+    out_dir = _archive_dir(archive_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    cutoff = _month_start(today or date.today(), -keep)
+    archived = []
+    for table in PARTITIONED:
+        with engine.connect() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            old = [n for n, m in list_partitions(conn, table) if _month_start(m, 1) <= cutoff]
+        for name in old:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            path = os.path.join(out_dir, f"{name}.csv.gz")
+            raw = engine.raw_connection()
+            try:
+                with gzip.open(path, "wb") as fh:
+                    raw.cursor().copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", fh)
+                raw.commit()
+            finally:
+                raw.close()
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE {name}"))
+            archived.append(path)
+    return archived
+
+
+def restore_partition(table: str, month: date, archive_dir: Optional[str] = None) -> int:
+    """Re-create ``month``'s partition of ``table`` and load it back from its archive file."""
+    name = _part_name(table, _month_start(month))
+    path = os.path.join(_archive_dir(archive_dir), f"{name}.csv.gz")
+    with engine.begin() as conn:
+        _create_month(conn, table, PARTITIONED[table], _month_start(month))
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        with gzip.open(path, "rb") as fh:
+            cur.copy_expert(f"COPY {name} FROM STDIN WITH (FORMAT csv, HEADER true)", fh)
+        raw.commit()
+        return cur.rowcount
+    finally:
+        raw.close()
+
+
+def ensure_partitioning():
+    """init_db hook: keep future months created on tables already converted.
+
+    Conversion itself takes an exclusive lock and rewrites the table, so it is
+    never run at startup; use ``scripts/partition_maintenance.py convert``.
+    """
+    if enabled():
+        ensure_future_partitions()
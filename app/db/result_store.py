@@ -0,0 +1,148 @@
+"""Shared store for results precomputed by the background worker.
+
+Values are stored in ``precomputed_results`` together with when and how fast
+they were computed, so pages can show staleness. A value computed before today,
+or more than two refresh intervals ago (the worker is behind or down), reads as
+a miss so pages fall back to live queries. Only data formats are used,
+never pickle, so a row cannot run code in the processes that read it:
+DataFrames as parquet, bytes (PDFs) as-is and anything else (KPI dicts) as JSON.
+Each payload starts with a one-byte tag naming its format; rows in any other
+format (e.g. older pickled ones) read as misses until the worker rewrites them.
+"""
+from __future__ import annotations
+
+import json
+from io import BytesIO
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import Table, Column, DateTime, Integer, LargeBinary, String, select, delete, insert
+
+from db.database import Base, SessionLocal
+
+# Rolling windows (days ending today) the worker keeps warm.
+PRECOMPUTED_WINDOWS = (7, 30, 90)
+# Days of rolling productivity statistics (crud.productivity_rolling) kept warm.
+ROLLING_STATS_DAYS = 30
+# How often the worker refreshes analytics (incl. rolling stats) and the PDF reports.
+ANALYTICS_EVERY = timedelta(minutes=5)
+REPORTS_EVERY = timedelta(minutes=15)
+
+precomputed_results = Table(
+    "precomputed_results",
+    Base.metadata,
+    Column("key", String(200), primary_key=True),
+    Column("payload", LargeBinary, nullable=False),
+    Column("computed_at", DateTime, nullable=False),
+    Column("duration_ms", Integer, nullable=False, default=0),
+)
+
+
+_PARQUET, _BYTES, _JSON = b"P", b"B", b"J"
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, pd.DataFrame):
+        buf = BytesIO()
+        value.to_parquet(buf)
+        return _PARQUET + buf.getvalue()
+    if isinstance(value, (bytes, bytearray)):
+        return _BYTES + bytes(value)
+    return _JSON + json.dumps(value).encode("utf-8")
+
+
+def _decode(payload: bytes) -> Any:
+    payload = bytes(payload)  # drivers may hand back a memoryview
+    tag, body = payload[:1], payload[1:]
+    if tag == _PARQUET:
+        return pd.read_parquet(BytesIO(body))
+    if tag == _BYTES:
+        return body
+    if tag == _JSON:
+        return json.loads(body)
+    raise ValueError(f"unknown result payload format {tag!r}")
+
+
+def put(key: str, value: Any, duration_ms: int = 0):
+    """Store ``value``: a DataFrame, bytes, or a JSON-serializable value (TypeError otherwise)."""
+    payload = _encode(value)
+    with SessionLocal() as db:
+        db.execute(delete(precomputed_results).where(precomputed_results.c.key == key))
+        db.execute(insert(precomputed_results).values(
+            key=key, payload=payload, computed_at=datetime.now(), duration_ms=duration_ms,
+        ))
+        db.commit()
+
+
+def is_fresh(key: str, computed_at: datetime) -> bool:
+    """Computed today and within two refresh intervals of the job that writes ``key``."""
+    now = datetime.now()
+    every = REPORTS_EVERY if key.startswith("report:") else ANALYTICS_EVERY
+    return computed_at.date() == now.date() and now - computed_at <= 2 * every
+
+
+def get(key: str, fresh: bool = True) -> Optional[Tuple[Any, datetime]]:
+    """Return ``(value, computed_at)``, or None when the key has not been computed.
+
+    With ``fresh`` (the default) a value that is not ``is_fresh`` also returns None.
+    """
+    with SessionLocal() as db:
+        row = db.execute(
+            select(precomputed_results.c.payload, precomputed_results.c.computed_at).where(precomputed_results.c.key == key)
+        ).first()
+    if not row or (fresh and not is_fresh(key, row[1])):
+        return None
+    try:
+        return _decode(row[0]), row[1]
+    except ValueError:
+        return None
+
+
+def lookup(keys: Dict[str, str]) -> Tuple[Dict[str, Any], Optional[datetime]]:
+    """Fetch several keys in one query: ``{alias: key}`` -> (``{alias: value}`` for fresh hits, oldest computed_at)."""
+    if not keys:
+        return {}, None
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(precomputed_results.c.key, precomputed_results.c.payload, precomputed_results.c.computed_at)
+            .where(precomputed_results.c.key.in_(list(keys.values())))
+        ).all()
+    by_key = {k: (p, at) for k, p, at in rows}
+    values, oldest = {}, None
+    for alias, key in keys.items():
+        if key in by_key:
+            payload, at = by_key[key]
+            if not is_fresh(key, at):
+                continue
+            try:
+                values[alias] = _decode(payload)
+            except ValueError:
+                continue
+            oldest = at if oldest is None or at < oldest else oldest
+    return values, oldest
+
+
+def analytics_key(days: int, name: str) -> str:
+    return f"analytics:{days}d:{name}"
+
+
+def report_key(days: int) -> str:
+    return f"report:{days}d:pdf"
+
+
+def window_for(start: date, end: date) -> Optional[int]:
+    """The precomputed window matching a [start, end] selection, if any (end must be today)."""
+    if end != date.today():
+        return None
+    days = (end - start).days
+    return days if days in PRECOMPUTED_WINDOWS else None
+
+
+def describe_age(computed_at: datetime) -> str:
+    secs = int((datetime.now() - computed_at).total_seconds())
+    if secs < 90:
+        return f"{secs}s ago"
+    if secs < 5400:
+        return f"{secs // 60} min ago"
+    return f"{secs // 3600} h ago"
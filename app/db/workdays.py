@@ -0,0 +1,260 @@
+"""Workday calendar: expected working days per employee, absences and streaks (PostgreSQL only).
+
+The expected grid is generated in the database with ``generate_series``, kept to
+each department's working week (``workdays`` in config, per-department overrides
+in ``[schedules]``) minus the ``holidays`` table, and anti-joined against
+attendance. Streaks are gaps-and-islands over each employee's sequence of
+workdays, so weekends and holidays neither break nor extend a streak.
+"""
+from __future__ import annotations
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import (
+    Table, Column, Date, ForeignKey, Index, Integer, String,
+    select, func, and_, or_, cast, exists, extract, insert, delete, literal, literal_column, true, union_all,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.database import Base, settings
+from db.directory import directory
+from db.filters import AnalyticsFilter
+from db.models import Employee, Attendance
+
+STREAK_KINDS = ("absent", "late")
+
+holidays = Table(
+    "holidays",
+    Base.metadata,
+    Column("holiday_id", Integer, primary_key=True),
+    Column("holiday_date", Date, nullable=False, index=True),
+    # NULL applies to every department
+    Column("department_id", Integer, ForeignKey("departments.dept_id", ondelete="CASCADE"), nullable=True),
+    Column("name", String(100), nullable=False),
+)
+# one holiday per date and scope; COALESCE so company-wide (NULL) holidays are deduplicated too
+Index("uq_holidays_date_department", holidays.c.holiday_date, func.coalesce(holidays.c.department_id, 0), unique=True)
+
+
+def supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def add_holiday(db: Session, holiday_date: date, name: str, department_id: Optional[int] = None) -> Optional[int]:
+    """Insert a holiday; None if one already exists for that date and department (or company-wide)."""
+    try:
+        holiday_id = db.execute(
+            insert(holidays).values(holiday_date=holiday_date, name=name, department_id=department_id)
+            .returning(holidays.c.holiday_id)
+        ).scalar_one()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    return holiday_id
+
+
+def delete_holiday(db: Session, holiday_id: int) -> bool:
+    deleted = db.execute(delete(holidays).where(holidays.c.holiday_id == holiday_id)).rowcount
+    db.commit()
+    return bool(deleted)
+
+
+def list_holidays(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    stmt = select(holidays.c.holiday_id, holidays.c.holiday_date, holidays.c.name, holidays.c.department_id)
+    if start:
+        stmt = stmt.where(holidays.c.holiday_date >= start)
+    if end:
+        stmt = stmt.where(holidays.c.holiday_date <= end)
+    res = db.execute(stmt.order_by(holidays.c.holiday_date))
+    return pd.DataFrame(res.all(), columns=list(res.keys()))
+
+
+def working_weeks() -> Tuple[Dict[int, Tuple[int, ...]], Tuple[int, ...]]:
+    """(dept_id -> ISO weekdays for departments with their own ``workdays``, the default week)."""
+    by_name = directory.department_options()
+    overrides = {
+        by_name[name]: tuple(int(d) for d in sched["workdays"])
+        for name, sched in settings.department_schedules.items()
+        if "workdays" in sched and name in by_name
+    }
+    return overrides, tuple(settings.workdays)
+
+
+def _workday_grid(f: AnalyticsFilter):
+    """CTE with one row per expected (employee, workday): absent/late flags and island keys for streaks.
+
+    ``<kind>_grp`` is the employee's workday number minus the row number among
+    days sharing the same flag value; consecutive flagged workdays share it.
+    """
+    series = func.generate_series(
+        cast(literal(f.start), Date), cast(literal(f.end), Date), literal_column("interval '1 day'")
+    ).table_valued("value").render_derived(name="cal")
+    day = cast(series.c.value, Date)
+    dow = extract("isodow", series.c.value)
+
+    overrides, default = working_weeks()
+    in_week = dow.in_(default)
+    if overrides:
+        in_week = and_(or_(Employee.department_id.is_(None), Employee.department_id.not_in(list(overrides))), in_week)
+    in_week = or_(in_week, *(and_(Employee.department_id == d, dow.in_(days)) for d, days in overrides.items()))
+    holiday = exists().where(
+        holidays.c.holiday_date == day,
+        or_(holidays.c.department_id.is_(None), holidays.c.department_id == Employee.department_id),
+    )
+    expected = (
+        select(Employee.employee_id, day.label("day"))
+        .select_from(Employee)
+        .join(series, true())
+        .where(*f.employee_clauses(), in_week, ~holiday, or_(Employee.join_date.is_(None), day >= Employee.join_date))
+        .cte("expected")
+    )
+
+    absent = Attendance.employee_id.is_(None)  # anti-join: no attendance row with a check-in
+    late = func.coalesce(Attendance.status == "Late", False)
+    n = func.row_number().over(partition_by=expected.c.employee_id, order_by=expected.c.day)
+    return (
+        select(
+            expected.c.employee_id,
+            expected.c.day,
+            absent.label("absent"),
+            late.label("late"),
+            (n - func.row_number().over(partition_by=(expected.c.employee_id, absent), order_by=expected.c.day)).label("absent_grp"),
+            (n - func.row_number().over(partition_by=(expected.c.employee_id, late), order_by=expected.c.day)).label("late_grp"),
+        )
+        .select_from(expected)
+        .outerjoin(Attendance, and_(
+            Attendance.employee_id == expected.c.employee_id,
+            Attendance.date == expected.c.day,
+            Attendance.check_in.is_not(None),
+        ))
+        .cte("workday_grid")
+    )
+
+
+def workday_totals(f: AnalyticsFilter):
+    """Select of ``workdays`` (expected) and ``present_workdays`` over ``f``'s range, for embedding in other queries.
+
+    The same counts monthly_attendance rates are built from; ``f`` needs start and end.
+    """
+    grid = _workday_grid(f)
+    return select(
+        func.count().label("workdays"),
+        func.count().filter(~grid.c.absent).label("present_workdays"),
+    ).select_from(grid)
+
+
+def _streaks(grid, kinds: Sequence[str], min_length: int):
+    parts = []
+    for kind in kinds:
+        days = func.count()
+        parts.append(
+            select(
+                grid.c.employee_id,
+                literal(kind).label("kind"),
+                func.min(grid.c.day).label("streak_start"),
+                func.max(grid.c.day).label("streak_end"),
+                days.label("days"),
+            )
+            .where(grid.c[kind])
+            .group_by(grid.c.employee_id, grid.c[f"{kind}_grp"])
+            .having(days >= min_length)
+        )
+    return union_all(*parts).cte("streaks")
+
+
+def _frame(db: Session, stmt) -> pd.DataFrame:
+    res = db.execute(stmt)
+    return pd.DataFrame(res.all(), columns=list(res.keys()))
+
+
+def absence_days(db: Session, start: date, end: date, filters: Optional[AnalyticsFilter] = None) -> pd.DataFrame:
+    """Expected workdays without a check-in (columns: employee_id, date)."""
+    grid = _workday_grid((filters or AnalyticsFilter()).narrow(start=start, end=end))
+    stmt = select(grid.c.employee_id, grid.c.day.label("date")).where(grid.c.absent).order_by(grid.c.day)
+    return _frame(db, stmt)
+
+
+def attendance_streaks(
+    db: Session,
+    start: date,
+    end: date,
+    filters: Optional[AnalyticsFilter] = None,
+    kinds: Sequence[str] = STREAK_KINDS,
+    min_length: int = 2,
+) -> pd.DataFrame:
+    """Runs of consecutive absent or late workdays (columns: employee_id, kind, streak_start, streak_end, days)."""
+    grid = _workday_grid((filters or AnalyticsFilter()).narrow(start=start, end=end))
+    streaks = _streaks(grid, kinds, min_length)
+    stmt = select(streaks).order_by(streaks.c.days.desc(), streaks.c.employee_id, streaks.c.streak_start)
+    return _frame(db, stmt)
+
+
+def monthly_attendance(db: Session, start: date, end: date, filters: Optional[AnalyticsFilter] = None) -> pd.DataFrame:
+    """Workdays, present/late/absent days and attendance rate per employee and month."""
+    grid = _workday_grid((filters or AnalyticsFilter()).narrow(start=start, end=end))
+    month = cast(func.date_trunc("month", grid.c.day), Date).label("month")
+    workdays = func.count()
+    present = func.count().filter(~grid.c.absent)
+    stmt = (
+        select(
+            grid.c.employee_id,
+            month,
+            workdays.label("workdays"),
+            present.label("present"),
+            func.count().filter(grid.c.late).label("late"),
+            func.count().filter(grid.c.absent).label("absent"),
+            (present * 1.0 / workdays).label("attendance_rate"),
+        )
+        .group_by(grid.c.employee_id, month)
+        .order_by(month, grid.c.employee_id)
+    )
+    df = _frame(db, stmt)
+    df["attendance_rate"] = df["attendance_rate"].astype(float)
+    return df
+
+
+def attendance_calendar_summary(
+    db: Session, start: date, end: date, filters: Optional[AnalyticsFilter] = None
+) -> pd.DataFrame:
+    """Per employee in one pass: workdays, absent/late days, attendance rate, longest and current streaks.
+
+    A current streak is one that runs through the employee's last expected workday in the range.
+    """
+    grid = _workday_grid((filters or AnalyticsFilter()).narrow(start=start, end=end))
+    totals = (
+        select(
+            grid.c.employee_id,
+            func.count().label("workdays"),
+            func.count().filter(grid.c.absent).label("absent_days"),
+            func.count().filter(grid.c.late).label("late_days"),
+            func.max(grid.c.day).label("last_workday"),
+        )
+        .group_by(grid.c.employee_id)
+        .cte("totals")
+    )
+    streaks = _streaks(grid, STREAK_KINDS, 1)
+    is_absent, is_late = streaks.c.kind == "absent", streaks.c.kind == "late"
+    current = streaks.c.streak_end == totals.c.last_workday
+    stmt = (
+        select(
+            totals.c.employee_id,
+            totals.c.workdays,
+            totals.c.absent_days,
+            totals.c.late_days,
+            ((totals.c.workdays - totals.c.absent_days) * 1.0 / totals.c.workdays).label("attendance_rate"),
+            func.coalesce(func.max(streaks.c.days).filter(is_absent), 0).label("longest_absence_streak"),
+            func.coalesce(func.max(streaks.c.days).filter(and_(is_absent, current)), 0).label("current_absence_streak"),
+            func.coalesce(func.max(streaks.c.days).filter(is_late), 0).label("longest_late_streak"),
+            func.coalesce(func.max(streaks.c.days).filter(and_(is_late, current)), 0).label("current_late_streak"),
+        )
+        .select_from(totals)
+        .outerjoin(streaks, streaks.c.employee_id == totals.c.employee_id)
+        .group_by(totals.c.employee_id, totals.c.workdays, totals.c.absent_days, totals.c.late_days, totals.c.last_workday)
+        .order_by(totals.c.employee_id)
+    )
+    df = _frame(db, stmt)
+    df["attendance_rate"] = df["attendance_rate"].astype(float)
+    return df
@@ -1,12 +1,18 @@
 from __future__ import annotations
 import streamlit as st
 from datetime import date, timedelta
+from functools import partial
 import pandas as pd
 
 from utils import auth
-from db.database import SessionLocal
+from db.database import SessionLocal, gather_reads
 from db import crud
-from utils.charts import productivity_trend, attendance_heatmap, dept_productivity_pie
+from db.filters import AnalyticsFilter
+from db import result_store
+from db import workdays
+from db.directory import directory
+from utils.charts import productivity_trend, attendance_heatmap, dept_productivity_pie, work_hours_timeseries
+from utils.reports import format_kpis
 
 
 st.set_page_config(page_title="Dashboard", page_icon="🏠")
@@ -31,13 +37,30 @@ with colf3:
 
 with SessionLocal() as db:
     if user["role"] != "admin":
+        me = user["employee_id"]
+        results = gather_reads({
+            "prod": partial(crud.daily_average_productivity, employee_id=me, start=start, end=end),
+            "att": partial(crud.list_attendance, employee_id=me, start=start, end=end),
+            "tasks": partial(crud.list_tasks, employee_id=me),
+            "kpis": partial(crud.kpi_summary, start=start, end=end, employee_id=me),
+            "active": partial(crud.working_hours_timeseries, employee_id=me, start=start, end=end, source="activity"),
+        })
+
+        kpis = format_kpis(results["kpis"])
+        kpi_cols = st.columns(4)
+        for col, label in zip(kpi_cols, ["Total Tasks", "Completed", "Avg Productivity", "Attendance Rate"]):
+            col.metric(label, kpis[label])
+
         st.subheader("Your Productivity Trend")
-        df_prod = crud.daily_average_productivity(db, employee_id=user["employee_id"], start=start, end=end)
-        fig = productivity_trend(df_prod)
+        fig = productivity_trend(results["prod"])
         st.plotly_chart(fig, width='stretch')
 
+        if not results["active"].empty:
+            st.subheader("Your Active Hours")
+            st.plotly_chart(work_hours_timeseries(results["active"], title="Active Hours"), width='stretch')
+
         st.subheader("Recent Attendance")
-        att = crud.list_attendance(db, employee_id=user["employee_id"], start=start, end=end)
+        att = results["att"]
         df_att = pd.DataFrame([
             {
                 "date": a.date,
@@ -50,7 +73,7 @@ with SessionLocal() as db:
         st.dataframe(df_att, width='stretch')
 
         st.subheader("Your Tasks")
-        tasks = crud.list_tasks(db, employee_id=user["employee_id"]) 
+        tasks = results["tasks"]
         df_tasks = pd.DataFrame([
             {
                 "task_id": t.task_id,
@@ -67,27 +90,97 @@ with SessionLocal() as db:
         st.dataframe(df_tasks, width='stretch')
 
     else:
+        today = date.today()
+        calendar = workdays.supported(db)
+        per_dept = st.number_input("Top performers per department (0 = overall top 5)", min_value=0, max_value=20, value=0)
+        flt = AnalyticsFilter(start=start, end=end, department_name=dept_filter or None)
+        window = result_store.window_for(start, end)
+        precomputed, computed_at = {}, None
+        if window and not dept_filter:
+            precomputed, computed_at = result_store.lookup({
+                "dept": result_store.analytics_key(window, "dept"),
+                "kpis": result_store.analytics_key(window, "kpis"),
+            })
+        rolling_hit = result_store.get(result_store.analytics_key(result_store.ROLLING_STATS_DAYS, "rolling"))
+        if rolling_hit:
+            precomputed["rolling"] = rolling_hit[0]
+            computed_at = min(computed_at, rolling_hit[1]) if computed_at else rolling_hit[1]
+        live = {
+            "dept": partial(crud.department_productivity, filters=flt),
+            "top": partial(crud.leaderboard, filters=flt, limit=None if per_dept else 5, per_department=per_dept or None),
+            "att_today": partial(crud.list_attendance, start=today, end=today),
+            "rolling": partial(crud.productivity_rolling, start=today - timedelta(days=6), end=today),
+            "kpis": partial(crud.kpi_summary, filters=flt),
+            "att": partial(crud.attendance_summary, start=start, end=end, filters=flt, include_absent=calendar),
+        }
+        if calendar:
+            live["calendar"] = partial(workdays.attendance_calendar_summary, start=start, end=end, filters=flt)
+            live["absent_today"] = partial(workdays.absence_days, start=today, end=today)
+        results = {**precomputed, **gather_reads({k: fn for k, fn in live.items() if k not in precomputed})}
+        if computed_at:
+            st.caption(f"Summary analytics precomputed {result_store.describe_age(computed_at)}.")
+
+        kpis = format_kpis(results["kpis"])
+        kpi_cols = st.columns(5)
+        for col, label in zip(kpi_cols, ["Total Tasks", "Completed", "Avg Productivity", "Attendance Rate", "Late Rate"]):
+            col.metric(label, kpis[label])
+
         st.subheader("Department Productivity")
-        df_dept = crud.department_productivity(db, start=start, end=end)
-        if dept_filter:
-            df_dept = df_dept[df_dept["department"].str.contains(dept_filter, case=False, na=False)]
+        df_dept = results["dept"]
         st.plotly_chart(dept_productivity_pie(df_dept), width='stretch')
 
         st.subheader("Top Performers")
-        df_top = crud.top_performers(db, limit=5, start=start, end=end)
+        df_top = results["top"]
         st.dataframe(df_top, width='stretch')
 
+        st.subheader("Attendance")
+        drill = st.selectbox("Drill into department", ["All"] + list(directory.department_options().keys()), key="heatmap_drill")
+        fig_att = attendance_heatmap(
+            results["att"],
+            employees_map=directory.names(),
+            departments_map=directory.department_names_by_employee(),
+            drill_department=None if drill == "All" else drill,
+            calendar=calendar,
+        )
+        st.plotly_chart(fig_att, width='stretch')
+        if calendar:
+            df_cal = results["calendar"]
+            streaks = df_cal[(df_cal["current_absence_streak"] >= 2) | (df_cal["current_late_streak"] >= 3)]
+            if not streaks.empty:
+                st.caption("Ongoing absence (2+ workdays) and late-arrival (3+ workdays) streaks")
+                names = directory.names()
+                st.dataframe(
+                    streaks.assign(name=streaks["employee_id"].map(names))[
+                        ["name", "current_absence_streak", "current_late_streak", "attendance_rate", "absent_days"]
+                    ].sort_values("current_absence_streak", ascending=False),
+                    width='stretch',
+                )
+
         st.subheader("Alerts")
-        today = date.today()
-        all_emps = crud.list_employees(db)
-        missing = []
-        for e in all_emps:
-            recs = crud.list_attendance(db, employee_id=e.employee_id, start=today, end=today)
-            if not recs or not recs[0].check_in:
-                missing.append(e.name)
+        if calendar:  # only employees expected to work today
+            missing = sorted(directory.names(results["absent_today"]["employee_id"].tolist()).values())
+        else:
+            checked_in = {a.employee_id for a in results["att_today"] if a.check_in}
+            missing = sorted(n for e, n in directory.names().items() if e not in checked_in)
         if missing:
             st.warning(f"Missing check-in today: {', '.join(missing[:10])}{' ...' if len(missing)>10 else ''}")
 
-        df_prod7 = crud.daily_average_productivity(db, employee_id=None, start=today - timedelta(days=7), end=today)
-        if not df_prod7.empty and df_prod7['avg_productivity'].mean() < 50:
-            st.error("Average productivity last 7 days is below 50.")
+        df_rolling = results["rolling"]
+        if not df_rolling.empty:
+            df_rolling = df_rolling[df_rolling["day"] >= today - timedelta(days=6)]
+        anomalies = crud.productivity_anomalies(df_rolling)
+        if not anomalies.empty:
+            names, is_emp = directory.names(), anomalies["level"] == "employee"
+            anomalies = anomalies.assign(name=[
+                names.get(e, str(e)) if emp else directory.department_name(e)
+                for e, emp in zip(anomalies["entity_id"], is_emp)
+            ])
+            st.error(
+                f"Productivity anomalies in the last 7 days: {int(anomalies['sudden_drop'].sum())} sudden drops, "
+                f"{int(anomalies['long_gap'].sum())} unusually long check-in/out days."
+            )
+            st.dataframe(
+                anomalies[["day", "level", "name", "avg_score", "rolling_7", "baseline_mean", "z_score", "wow_delta",
+                           "avg_hours", "sudden_drop", "long_gap"]].round(2),
+                width='stretch',
+            )
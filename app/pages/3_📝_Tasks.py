@@ -6,6 +6,9 @@ import pandas as pd
 from utils import auth
 from db.database import SessionLocal
 from db import crud
+from db.directory import directory
+from db.filters import AnalyticsFilter
+from utils.pickers import employee_picker
 
 
 st.set_page_config(page_title="Tasks", page_icon="📝")
@@ -20,10 +23,7 @@ st.title("Tasks")
 with SessionLocal() as db:
     if user["role"] == "admin":
         st.subheader("Assign New Task")
-        emp_list = crud.list_employees(db)
-        emp_map = {f"{e.name} ({e.email})": e.employee_id for e in emp_list}
-        emp_choice = st.selectbox("Employee", list(emp_map.keys()))
-        employee_id = emp_map[emp_choice]
+        employee_id = employee_picker("Employee", key="create_task_employee")
         task_name = st.text_input("Task Name")
 
         def datetime_picker(label: str):
@@ -44,7 +44,7 @@ with SessionLocal() as db:
             end_time = datetime_picker("End Time")
             status = st.selectbox("Status", ["Pending", "In Progress", "Completed"], key="create_task_status")
             pscore = st.number_input("Productivity Score", min_value=0.0, max_value=100.0, value=0.0, key="create_task_pscore")
-            if st.button("Create Task", type="primary"):
+            if st.button("Create Task", type="primary", disabled=employee_id is None):
                 crud.create_task(db, employee_id, task_name, start_time, end_time, status, pscore)
                 st.success("Task created.")
 
@@ -63,7 +63,12 @@ with SessionLocal() as db:
         }
         for t in tasks
     ])
-    st.dataframe(df, width='stretch')
+    if user["role"] == "admin" and not df.empty:
+        event = st.dataframe(df, width='stretch', on_select="rerun", selection_mode="multi-row", key="tasks_table")
+        selected_ids = df.iloc[event.selection.rows]["task_id"].tolist()
+    else:
+        st.dataframe(df, width='stretch')
+        selected_ids = []
 
     st.subheader("Update Task")
     if not df.empty:
@@ -76,6 +81,37 @@ with SessionLocal() as db:
             st.success("Task updated.")
 
     if user["role"] == "admin":
+        st.subheader("Bulk Actions")
+        st.caption(f"{len(selected_ids)} task(s) selected in the table above.")
+        b1, b2 = st.columns(2)
+        with b1:
+            bulk_status = st.selectbox("Set Status", ["(unchanged)", "Pending", "In Progress", "Completed"], key="bulk_status")
+            set_score = st.checkbox("Set Productivity Score", key="bulk_set_score")
+            bulk_score = st.number_input("Score", min_value=0.0, max_value=100.0, value=0.0, key="bulk_score", disabled=not set_score)
+            if st.button("Update Selected", disabled=not selected_ids, key="btn_bulk_update"):
+                n = crud.bulk_update_tasks(
+                    db, task_ids=selected_ids,
+                    status=None if bulk_status == "(unchanged)" else bulk_status,
+                    productivity_score=bulk_score if set_score else None,
+                )
+                st.success(f"Updated {n} task(s).")
+        with b2:
+            confirm = st.checkbox("Confirm bulk delete", key="bulk_delete_confirm")
+            if st.button("Delete Selected", type="secondary", disabled=not (selected_ids and confirm), key="btn_bulk_delete"):
+                n = crud.bulk_delete_tasks(db, task_ids=selected_ids)
+                st.warning(f"Deleted {n} task(s).")
+
+        with st.expander("Assign Task to a Department"):
+            dep_map = directory.department_options()
+            dep_choice = st.selectbox("Department", list(dep_map.keys()), key="bulk_assign_dept")
+            bulk_task_name = st.text_input("Task Name", key="bulk_assign_name")
+            bulk_assign_status = st.selectbox("Status", ["Pending", "In Progress", "Completed"], key="bulk_assign_status")
+            if st.button("Assign to Department", type="primary", disabled=not (dep_choice and bulk_task_name), key="btn_bulk_assign"):
+                n = crud.assign_task_bulk(
+                    db, AnalyticsFilter(department_ids=(dep_map[dep_choice],)), bulk_task_name, status=bulk_assign_status
+                )
+                st.success(f"Assigned to {n} employee(s).")
+
         st.subheader("Delete Task")
         if not df.empty:
             t_id2 = st.selectbox("Task ID to Delete", df["task_id"].tolist(), key="delete_task_id")
@@ -1,13 +1,18 @@
 from __future__ import annotations
 import streamlit as st
 from datetime import date, timedelta
+from functools import partial
 import pandas as pd
 
 from utils import auth
-from db.database import SessionLocal
+from db.database import SessionLocal, gather_reads
 from db import crud
-from utils.reports import generate_pdf_report, df_to_csv_bytes
-from utils.charts import work_hours_timeseries
+from db.filters import AnalyticsFilter
+from db import result_store
+from db import workdays
+from utils.reports import generate_pdf_report, df_to_csv_bytes, format_kpis
+from utils.charts import work_hours_timeseries, utilization_chart
+from utils.pickers import employee_picker
 from utils.csv_utils import import_attendance_csv, import_tasks_csv
 
 
@@ -29,22 +34,53 @@ with SessionLocal() as db:
     with col3:
         emp_filter = None
         if user["role"] == "admin":
-            emps = {f"{e.name} ({e.email})": e.employee_id for e in crud.list_employees(db)}
-            emp_choice = st.selectbox("Employee (optional)", ["All"] + list(emps.keys()))
-            emp_filter = None if emp_choice == "All" else emps[emp_choice]
+            emp_filter = employee_picker("Employee (optional)", key="report_employee", allow_all=True)
 
     st.subheader("KPIs")
-    df_dept = crud.department_productivity(db, start=start, end=end)
-    df_top = crud.top_performers(db, start=start, end=end)
-    total_tasks = len(crud.list_tasks(db, employee_id=emp_filter))
-    kpi_cols = st.columns(3)
-    kpi_cols[0].metric("Departments", len(df_dept))
-    kpi_cols[1].metric("Top Performers Listed", len(df_top))
-    kpi_cols[2].metric("Total Tasks", total_tasks)
+    hours_source = st.radio("Hours source", ["attendance", "activity"], horizontal=True,
+                            format_func=lambda s: "Check-in/out" if s == "attendance" else "Activity heartbeats")
+    window = result_store.window_for(start, end)
+    precomputed, computed_at = {}, None
+    if window:
+        keys = {"dept": result_store.analytics_key(window, "dept"), "top": result_store.analytics_key(window, "leaderboard")}
+        if emp_filter is None:
+            keys.update(kpis=result_store.analytics_key(window, "kpis"), pdf=result_store.report_key(window))
+        precomputed, computed_at = result_store.lookup(keys)
+    live = {
+        "dept": partial(crud.department_productivity, start=start, end=end),
+        "top": partial(crud.leaderboard, filters=AnalyticsFilter(start=start, end=end), limit=10),
+        "kpis": partial(crud.kpi_summary, start=start, end=end, employee_id=emp_filter),
+        "hours": partial(crud.working_hours_timeseries, employee_id=emp_filter, start=start, end=end, source=hours_source),
+        "util": partial(crud.task_utilization, start=start, end=end, filters=AnalyticsFilter().narrow(employee_id=emp_filter)),
+    }
+    calendar_exports = workdays.supported(db)
+    if calendar_exports:
+        report_filter = AnalyticsFilter().narrow(employee_id=emp_filter)
+        live.update(
+            monthly=partial(workdays.monthly_attendance, start=start, end=end, filters=report_filter),
+            streaks=partial(workdays.attendance_streaks, start=start, end=end, filters=report_filter),
+        )
+    results = {**precomputed, **gather_reads({k: fn for k, fn in live.items() if k not in precomputed})}
+    if computed_at:
+        st.caption(f"Using analytics precomputed {result_store.describe_age(computed_at)} for the last {window} days.")
+    df_dept, df_hours = results["dept"], results["hours"]
+    df_top = results["top"].drop(columns=["employee_id"]).round({"avg_score": 1})
+    kpis = format_kpis(results["kpis"])
+    kpi_cols = st.columns(5)
+    for i, (label, value) in enumerate(kpis.items()):
+        kpi_cols[i % 5].metric(label, value)
 
-    df_hours = crud.working_hours_timeseries(db, employee_id=emp_filter, start=start, end=end)
     st.plotly_chart(work_hours_timeseries(df_hours), width='stretch')
 
+    df_util = results["util"]
+    st.plotly_chart(utilization_chart(df_util), width='stretch')
+    if not df_util.empty:
+        double_booked = df_util[df_util["overlap_hours"] > 0]
+        st.caption(
+            f"{len(double_booked)} employee-days with overlapping tasks "
+            f"({df_util['overlap_hours'].sum():.1f} h double-booked, {df_util['idle_hours'].sum():.1f} h idle while checked in)."
+        )
+
     st.subheader("Export Data")
     tab1, tab2 = st.tabs(["CSV", "PDF"])
     with tab1:
@@ -55,15 +91,21 @@ with SessionLocal() as db:
         btn2 = st.download_button(
             "Download Top Performers", data=df_to_csv_bytes(df_top), file_name="top_performers.csv", mime="text/csv"
         )
+        st.download_button(
+            "Download Task Utilization", data=df_to_csv_bytes(df_util), file_name="task_utilization.csv", mime="text/csv"
+        )
+        if calendar_exports:
+            st.download_button(
+                "Download Monthly Attendance", data=df_to_csv_bytes(results["monthly"]), file_name="monthly_attendance.csv", mime="text/csv"
+            )
+            st.download_button(
+                "Download Absence & Late Streaks", data=df_to_csv_bytes(results["streaks"]), file_name="attendance_streaks.csv", mime="text/csv"
+            )
     with tab2:
         st.caption("Generate a printable PDF report")
-        pdf = generate_pdf_report(
+        pdf = results.get("pdf") or generate_pdf_report(
             title="Team Report",
-            kpis={
-                "Departments": str(len(df_dept)),
-                "Top Performers": str(len(df_top)),
-                "Total Tasks": str(total_tasks),
-            },
+            kpis={"Departments": str(len(df_dept)), **kpis},
             sections={
                 "Department Productivity": df_dept,
                 "Top Performers": df_top,
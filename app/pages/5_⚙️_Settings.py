@@ -6,6 +6,12 @@ import pandas as pd
 from utils import auth
 from db.database import SessionLocal
 from db import crud
+from db import workdays
+from db.directory import directory
+from utils.pickers import employee_picker
+from utils.figure_cache import figure_cache
+from worker.scheduler import job_status
+from utils.employee_import import import_employees_csv, EMPLOYEE_CSV_COLUMNS
 
 
 st.set_page_config(page_title="Settings", page_icon="⚙️")
@@ -33,6 +39,30 @@ with SessionLocal() as db:
     df_deps = pd.DataFrame([{ "dept_id": d.dept_id, "dept_name": d.dept_name, "manager_name": d.manager_name } for d in deps])
     st.dataframe(df_deps, width='stretch')
 
+    with st.expander("Holidays"):
+        st.caption("Holidays are excluded from expected workdays when computing absences and streaks.")
+        hol_dep_map = directory.department_options()
+        h1, h2, h3 = st.columns(3)
+        with h1:
+            hol_date = st.date_input("Date", value=date.today(), key="holiday_date")
+        with h2:
+            hol_name = st.text_input("Name", key="holiday_name")
+        with h3:
+            hol_dept = st.selectbox("Department", ["All"] + list(hol_dep_map.keys()), key="holiday_department")
+        if st.button("Add Holiday", key="btn_add_holiday") and hol_name:
+            if workdays.add_holiday(db, hol_date, hol_name, None if hol_dept == "All" else hol_dep_map[hol_dept]) is None:
+                st.error(f"A holiday on {hol_date} for {hol_dept} already exists.")
+            else:
+                st.success("Holiday added.")
+        df_hol = workdays.list_holidays(db)
+        if not df_hol.empty:
+            st.dataframe(df_hol, width='stretch')
+            hol_del = st.selectbox("Remove holiday", df_hol["holiday_id"].tolist(), key="holiday_delete",
+                                   format_func=lambda h: " - ".join(map(str, df_hol.loc[df_hol["holiday_id"] == h, ["holiday_date", "name"]].iloc[0])))
+            if st.button("Remove Holiday", key="btn_delete_holiday"):
+                workdays.delete_holiday(db, hol_del)
+                st.warning("Holiday removed.")
+
     st.divider()
 
     st.subheader("Employees")
@@ -40,7 +70,7 @@ with SessionLocal() as db:
         name = st.text_input("Name", key="create_emp_name")
         email = st.text_input("Email", key="create_emp_email")
         role = st.selectbox("Role", ["employee", "admin"], key="create_emp_role") 
-        dep_map = {d.dept_name: d.dept_id for d in deps}
+        dep_map = directory.department_options()
         dept_name_sel = st.selectbox("Department", ["None"] + list(dep_map.keys()), key="create_emp_department")
         dept_id = None if dept_name_sel == "None" else dep_map[dept_name_sel]
         jdate = st.date_input("Join Date", value=date.today(), key="create_emp_join_date")
@@ -49,6 +79,16 @@ with SessionLocal() as db:
             crud.create_employee(db, name=name, email=email, role=role, department_id=dept_id, join_date=jdate, password=password if password else None)
             st.success("Employee created.")
 
+    with st.expander("Bulk Import Employees (CSV)"):
+        st.markdown("- Columns: " + ",".join(EMPLOYEE_CSV_COLUMNS))
+        up_emps = st.file_uploader("Upload Employees CSV", type=["csv"], key="employees_csv")
+        if up_emps is not None and st.button("Import Employees", type="primary", key="btn_import_employees"):
+            with st.spinner("Hashing passwords and inserting employees..."):
+                created, errors = import_employees_csv(db, up_emps.getvalue())
+            st.success(f"Employee import complete. Created={created}, Errors={len(errors)}")
+            if errors:
+                st.dataframe(pd.DataFrame({"error": errors}), width='stretch')
+
     emps = crud.list_employees(db)
     df_emps = pd.DataFrame([
         {
@@ -64,10 +104,9 @@ with SessionLocal() as db:
     st.dataframe(df_emps, width='stretch')
 
     st.subheader("Edit/Delete Employee")
-    if not df_emps.empty:
-        emp_ids = df_emps["employee_id"].tolist()
-        eid = st.selectbox("Employee ID", emp_ids, key="edit_emp_select")
-        e = next((x for x in emps if x.employee_id == eid), None)
+    eid = employee_picker("Employee", key="edit_emp")
+    if eid is not None:
+        e = crud.get_employee(db, eid)
         if e:
             col1, col2 = st.columns(2)
             with col1:
@@ -84,3 +123,17 @@ with SessionLocal() as db:
             if st.button("Delete Employee", type="secondary", key=f"btn_delete_emp_{eid}"):
                 crud.delete_employee(db, eid)
                 st.warning("Employee deleted.")
+
+st.divider()
+st.subheader("Diagnostics")
+cache_stats = figure_cache.stats()
+dcols = st.columns(4)
+dcols[0].metric("Figure cache hit rate", f"{cache_stats['hit_rate'] * 100:.1f}%")
+dcols[1].metric("Cached figures", cache_stats["entries"])
+dcols[2].metric("Cache size (MB)", f"{cache_stats['bytes'] / 1e6:.1f}")
+dcols[3].metric("Evictions", cache_stats["evictions"])
+
+jobs = job_status()
+if jobs:
+    st.caption("Background worker jobs")
+    st.dataframe(pd.DataFrame(jobs), width='stretch')
@@ -3,42 +3,66 @@ import streamlit as st
 from typing import Optional
 
 from db.crud import get_employee_by_email
-from db.database import SessionLocal
+from db.database import SessionLocal, tenancy_enabled, set_tenant, current_tenant
 from config.settings import load_settings
-from utils.security import verify_password
+from utils.security import verify_password_bounded, hash_password_bounded, needs_rehash
+from utils.figure_cache import figure_cache
 
 settings = load_settings()
+# keep cached figures per tenant
+figure_cache.scope = current_tenant
 
 
 SESSION_KEY = "auth_user"
+TENANT_KEY = "auth_tenant"
 
 
-def login(email: str, role: str, passcode: Optional[str] = None, password: Optional[str] = None) -> bool:
+def activate_tenant():
+    """Route this script run's queries to the session's tenant (no-op unless tenancy is enabled)."""
+    if tenancy_enabled():
+        set_tenant(st.session_state.get(TENANT_KEY))
+
+
+def login(email: str, role: str, passcode: Optional[str] = None, password: Optional[str] = None,
+          tenant: Optional[str] = None) -> bool:
+    if tenancy_enabled():
+        if not tenant:
+            return False
+        set_tenant(tenant)
+    # a direct indexed lookup rather than db.directory, which may lag writes made by other processes
     with SessionLocal() as db:
-        user = get_employee_by_email(db, email)
-        if not user:
+        emp = get_employee_by_email(db, email)
+        if emp is None:
             return False
         if role == "admin":
             if passcode != settings.admin_passcode:
                 return False
         if role == "employee":
-            if user.role not in ("employee", "admin"):
+            if emp.role not in ("employee", "admin"):
                 return False
-            if not password or not verify_password(password, user.password_hash):
+            if not password:
                 return False
-        st.session_state[SESSION_KEY] = {
-            "employee_id": user.employee_id,
-            "name": user.name,
-            "email": user.email,
-            "role": role if role == "admin" else user.role,
-            "department_id": user.department_id,
+            if not verify_password_bounded(password, emp.password_hash):
+                return False
+            if needs_rehash(emp.password_hash):
+                emp.password_hash = hash_password_bounded(password)
+                db.commit()
+        user = {
+            "employee_id": emp.employee_id,
+            "name": emp.name,
+            "email": emp.email,
+            "role": role if role == "admin" else emp.role,
+            "department_id": emp.department_id,
         }
-        return True
+    st.session_state[TENANT_KEY] = tenant
+    st.session_state[SESSION_KEY] = user
+    return True
 
 
 def logout():
     if SESSION_KEY in st.session_state:
         del st.session_state[SESSION_KEY]
+    st.session_state.pop(TENANT_KEY, None)
 
 
 def current_user() -> Optional[dict]:
@@ -46,6 +70,7 @@ def current_user() -> Optional[dict]:
 
 
 def require_login():
+    activate_tenant()
     user = current_user()
     if not user:
         st.warning("Please log in to continue.")
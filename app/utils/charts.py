@@ -1,33 +1,166 @@
 from __future__ import annotations
 from typing import Optional
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
-from utils.helpers import status_to_value
+from utils.helpers import encode_statuses
+from utils.figure_cache import cached_figure
 
+# Payload budget: a figure never carries more than MAX_POINTS points in total,
+# and switches to WebGL traces once it carries more than WEBGL_THRESHOLD.
+MAX_POINTS = 2000
+WEBGL_THRESHOLD = 1000
+# Above this many employee x day cells the heatmap aggregates to department x week.
+HEATMAP_CELL_BUDGET = 40_000
 
-def productivity_trend(df_daily: pd.DataFrame, title: str = "Daily Productivity"):
+
+def pick_bucket(start, end) -> str:
+    """Pandas resample rule for a date range: daily up to ~2 months, weekly up to a year, else monthly."""
+    span = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    if span <= 62:
+        return "D"
+    if span <= 370:
+        return "W-MON"
+    return "MS"
+
+
+def _resample(df: pd.DataFrame, x: str, y: str, bucket: Optional[str], by: Optional[str] = None) -> pd.DataFrame:
+    if df.empty:
+        return df
+    df = df.assign(**{x: pd.to_datetime(df[x])})
+    rule = pick_bucket(df[x].min(), df[x].max()) if bucket == "auto" else bucket
+    if not rule or rule == "D" and by is None and df[x].is_unique:
+        return df.sort_values(x)
+    keys = [pd.Grouper(key=x, freq=rule, label="left", closed="left")]
+    if by:
+        keys = [by] + keys
+    return df.groupby(keys)[y].mean().dropna().reset_index().sort_values(x)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` points preserving the visual shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    out = np.empty(threshold, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _downsample(df: pd.DataFrame, x: str, y: str, max_points: int, by: Optional[str] = None) -> pd.DataFrame:
+    if by is None:
+        if len(df) <= max_points:
+            return df
+        xs = pd.to_datetime(df[x]).astype("int64").to_numpy()
+        return df.iloc[lttb_indices(xs, df[y].to_numpy(), max_points)]
+    groups = list(df.groupby(by, sort=False))
+    budget = max(max_points // max(len(groups), 1), 3)
+    return pd.concat([_downsample(g, x, y, budget) for _, g in groups], ignore_index=True)
+
+
+def _top_n_with_others(df: pd.DataFrame, by: str, x: str, y: str, top_n: int, others_label: str = "others") -> pd.DataFrame:
+    """Keep the ``top_n`` series by total ``y``; average the remainder into one ``others`` series."""
+    if top_n <= 0 or df[by].nunique() <= top_n:
+        return df
+    keep = df.groupby(by)[y].sum().nlargest(top_n).index
+    top = df[df[by].isin(keep)].astype({by: str})
+    rest = df[~df[by].isin(keep)].groupby(x, as_index=False)[y].mean()
+    rest[by] = others_label
+    return pd.concat([top, rest], ignore_index=True)
+
+
+def _render_mode(df: pd.DataFrame) -> str:
+    return "webgl" if len(df) > WEBGL_THRESHOLD else "auto"
+
+
+@cached_figure
+def productivity_trend(
+    df_daily: pd.DataFrame,
+    title: str = "Daily Productivity",
+    bucket: Optional[str] = "auto",
+    max_points: int = MAX_POINTS,
+):
     if df_daily.empty:
         return px.line(title=title)
-    fig = px.line(df_daily, x="day", y="avg_productivity", markers=True, title=title)
+    df = _downsample(_resample(df_daily, "day", "avg_productivity", bucket), "day", "avg_productivity", max_points)
+    fig = px.line(df, x="day", y="avg_productivity", markers=len(df) <= 200, title=title, render_mode=_render_mode(df))
     fig.update_layout(yaxis_title="Avg Productivity", xaxis_title="Date")
     return fig
 
 
-def attendance_heatmap(df_att: pd.DataFrame, employees_map: Optional[dict] = None, title: str = "Attendance Heatmap"):
+def _dense_grid(rows: pd.Series, cols: pd.Series, values: np.ndarray, fill: float = 0.0):
+    """Mean of ``values`` per (row, col) via factorized codes and NumPy scatter-add; empty cells get ``fill``."""
+    r_codes, r_labels = pd.factorize(rows, sort=True)
+    c_codes, c_labels = pd.factorize(cols, sort=True)
+    shape = (len(r_labels), len(c_labels))
+    sums = np.zeros(shape)
+    counts = np.zeros(shape)
+    np.add.at(sums, (r_codes, c_codes), values)
+    np.add.at(counts, (r_codes, c_codes), 1)
+    grid = np.divide(sums, counts, out=np.full(shape, fill), where=counts > 0)
+    return grid, r_labels, c_labels
+
+
+@cached_figure
+def attendance_heatmap(
+    df_att: pd.DataFrame,
+    employees_map: Optional[dict] = None,
+    title: str = "Attendance Heatmap",
+    departments_map: Optional[dict] = None,
+    drill_department: Optional[str] = None,
+    cell_budget: int = HEATMAP_CELL_BUDGET,
+    calendar: bool = False,
+):
+    """Employee x day attendance grid.
+
+    ``departments_map`` (employee_id -> department name) enables the aggregated
+    department x week tier, used when the grid would exceed ``cell_budget`` cells;
+    ``drill_department`` restricts the grid to that department's employees.
+    With ``calendar`` set, ``df_att`` carries explicit "Absent" rows for missed
+    workdays and cells without a row (non-workdays) are left blank instead of 0.
+    """
+    fill = np.nan if calendar else 0.0
     if df_att.empty:
         return px.imshow([[0]], labels=dict(color="Status"), title=title)
-    df = df_att.copy()
-    df["value"] = df["status"].map(status_to_value)
-    if employees_map:
-        df["employee"] = df["employee_id"].map(employees_map)
+    df = df_att
+    dept = df["employee_id"].map(departments_map).fillna("(none)") if departments_map else None
+    if drill_department and dept is not None:
+        keep = (dept == drill_department).to_numpy()
+        df, dept = df[keep], dept[keep]
+        title = f"{title} - {drill_department}"
+        if df.empty:
+            return px.imshow([[0]], labels=dict(color="Status"), title=title)
+    values = encode_statuses(df["status"])
+    dates = pd.to_datetime(df["date"])
+
+    cells = df["employee_id"].nunique() * dates.nunique()
+    if cells > cell_budget and dept is not None and not drill_department:
+        weeks = dates.dt.to_period("W-SUN").dt.start_time
+        grid, rows, cols = _dense_grid(dept, weeks, values, fill)
+        x = cols.strftime("%Y-%m-%d")
+        y = list(rows)
+        title = f"{title} (department x week)"
     else:
-        df["employee"] = df["employee_id"].astype(str)
-    pivot = df.pivot_table(index="employee", columns="date", values="value", aggfunc="mean", fill_value=0)
+        grid, rows, cols = _dense_grid(df["employee_id"], dates, values, fill)
+        x = cols.strftime("%Y-%m-%d")
+        y = [employees_map.get(e, str(e)) for e in rows] if employees_map else [str(e) for e in rows]
     fig = px.imshow(
-        pivot.values,
-        x=pivot.columns.astype(str),
-        y=pivot.index,
+        grid,
+        x=x,
+        y=y,
         color_continuous_scale=["#fca5a5", "#fcd34d", "#86efac"],
         title=title,
         aspect="auto",
@@ -36,15 +169,52 @@ def attendance_heatmap(df_att: pd.DataFrame, employees_map: Optional[dict] = Non
     return fig
 
 
+@cached_figure
 def dept_productivity_pie(df: pd.DataFrame, title: str = "Department Productivity"):
     if df.empty:
         return px.pie(title=title)
     return px.pie(df, names="department", values="avg_productivity", title=title, hole=0.3)
 
 
-def work_hours_timeseries(df_hours: pd.DataFrame, title: str = "Work Hours"):
+@cached_figure
+def work_hours_timeseries(
+    df_hours: pd.DataFrame,
+    title: str = "Work Hours",
+    bucket: Optional[str] = "auto",
+    top_n: int = 10,
+    max_points: int = MAX_POINTS,
+):
+    """Hours per employee over time, bucketed (mean daily hours per bucket), top-N plus "others"."""
     if df_hours.empty:
         return px.line(title=title)
-    fig = px.line(df_hours, x="date", y="hours", color="employee_id", markers=True, title=title)
-    fig.update_layout(yaxis_title="Hours", xaxis_title="Date")
+    df = _resample(df_hours, "date", "hours", bucket, by="employee_id")
+    df = _top_n_with_others(df, "employee_id", "date", "hours", top_n)
+    df = _downsample(df, "date", "hours", max_points, by="employee_id")
+    fig = px.line(
+        df, x="date", y="hours", color=df["employee_id"].astype(str), markers=len(df) <= 200,
+        title=title, render_mode=_render_mode(df),
+    )
+    fig.update_layout(yaxis_title="Hours", xaxis_title="Date", legend_title_text="employee_id")
+    return fig
+
+
+@cached_figure
+def utilization_chart(df_util: pd.DataFrame, title: str = "Task Utilization", bucket: Optional[str] = "auto"):
+    """Stacked mean busy / double-booked / idle hours per employee-day, bucketed over time."""
+    if df_util.empty:
+        return px.bar(title=title)
+    parts = {"busy_hours": "Busy", "overlap_hours": "Double-booked", "idle_hours": "Idle (checked in)"}
+    df = df_util.assign(day=pd.to_datetime(df_util["day"]))
+    rule = pick_bucket(df["day"].min(), df["day"].max()) if bucket == "auto" else (bucket or "D")
+    df = (
+        df.groupby(pd.Grouper(key="day", freq=rule, label="left", closed="left"))[list(parts)]
+        .mean().dropna(how="all").reset_index()
+        .melt(id_vars="day", var_name="kind", value_name="hours")
+    )
+    df["kind"] = df["kind"].map(parts)
+    fig = px.bar(
+        df, x="day", y="hours", color="kind", title=title,
+        color_discrete_map={"Busy": "#60a5fa", "Double-booked": "#f87171", "Idle (checked in)": "#d1d5db"},
+    )
+    fig.update_layout(barmode="stack", yaxis_title="Hours per employee-day", xaxis_title="Date", legend_title_text="")
     return fig
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from io import StringIO
+from typing import List, Tuple
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from db import crud
+from db.directory import directory
+
+EMPLOYEE_CSV_COLUMNS = ["name", "email", "role", "department", "join_date", "password"]
+
+
+def import_employees_csv(db: Session, data: bytes, batch_size: int = 500) -> Tuple[int, List[str]]:
+    """Bulk-provision employees from CSV (columns: name,email,role,department,join_date,password).
+
+    Rows with a missing name/email, a duplicate email or an unknown department are
+    skipped and reported; the rest are inserted via crud.bulk_create_employees.
+    Returns (created, errors).
+    """
+    df = pd.read_csv(StringIO(data.decode("utf-8")), dtype=str, keep_default_na=False)
+    df.columns = [c.strip().lower() for c in df.columns]
+    missing = {"name", "email"} - set(df.columns)
+    if missing:
+        return 0, [f"missing columns: {', '.join(sorted(missing))}"]
+    for col in EMPLOYEE_CSV_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    df = df.apply(lambda s: s.str.strip())
+
+    errors: List[str] = []
+    depts = directory.department_options()
+    bad = (df["name"] == "") | (df["email"] == "")
+    dup = df["email"].duplicated(keep="first") | df["email"].map(lambda e: directory.employee_id_for_email(e) is not None)
+    unknown_dept = (df["department"] != "") & ~df["department"].isin(depts.keys())
+    for i in df.index[bad | dup | unknown_dept]:
+        reason = "missing name/email" if bad[i] else "duplicate email" if dup[i] else f"unknown department {df.at[i, 'department']!r}"
+        errors.append(f"line {i + 2}: {reason}")
+    ok = df[~(bad | dup | unknown_dept)]
+
+    join_dates = pd.to_datetime(ok["join_date"], errors="coerce").dt.date
+    rows = [
+        {
+            "name": r.name,
+            "email": r.email,
+            "role": r.role or "employee",
+            "department_id": depts.get(r.department),
+            "join_date": None if pd.isna(jd) else jd,
+            "password": r.password or None,
+        }
+        for r, jd in zip(ok.itertuples(index=False), join_dates)
+    ]
+    created = crud.bulk_create_employees(db, rows, batch_size=batch_size)
+    return created, errors
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Figures are kept until their combined estimated size exceeds this
+# (one budget shared by all tenants; keys are tenant-scoped).
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def fingerprint(obj: Any) -> str:
+    """Cheap content hash: shape, columns, dtypes and a vectorized hash of the underlying arrays."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr((obj.shape, list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        except TypeError:  # unhashable cells, e.g. list columns
+            h.update(obj.to_json(orient="split", date_format="iso", default_handler=repr).encode())
+    elif isinstance(obj, dict):
+        h.update(repr(sorted(obj.items(), key=lambda kv: repr(kv[0]))).encode())
+    else:
+        h.update(repr(obj).encode())
+    return h.hexdigest()
+
+
+def estimate_size(obj: Any) -> int:
+    """Rough size in bytes of a figure's data (from ``fig.to_dict()``), without serializing it.
+
+    Arrays count their buffer size, strings their length; everything else a word.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(len(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(v) for v in obj) + len(obj)
+    return 8
+
+
+class FigureCache:
+    """Process-wide LRU of built Plotly figures, bounded by their total estimated size.
+
+    ``scope`` returns a string prepended to every key (the active tenant, wired
+    in by utils.auth), so this module needs nothing from db.
+    """
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES, scope: Optional[Callable[[], Optional[str]]] = None):
+        self.max_bytes = max_bytes
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            fig = self._items.get(key)
+            if fig is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return fig
+
+    def put(self, key: str, fig: Any, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self._items.pop(key, None) is not None:
+                self._bytes -= self._sizes.pop(key)
+            self._items[key] = fig
+            self._sizes[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted, _ = self._items.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(fn: Callable):
+    """Memoize a chart builder on a fingerprint of its arguments.
+
+    A hit returns the cached figure object itself, with no rebuild or
+    re-validation; callers must treat it as read-only (copy with
+    ``go.Figure(fig)`` before changing it).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        scope = figure_cache.scope() if figure_cache.scope else None
+        parts = [scope or "", fn.__module__, fn.__qualname__]
+        parts += [fingerprint(a) for a in args]
+        parts += [f"{k}={fingerprint(v)}" for k, v in sorted(kwargs.items())]
+        key = hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+        fig = figure_cache.get(key)
+        if fig is None:
+            fig = fn(*args, **kwargs)
+            # serializing just to measure would double the cost of every miss (Streamlit serializes it again)
+            figure_cache.put(key, fig, estimate_size(fig.to_dict()))
+        return fig
+    return wrapper
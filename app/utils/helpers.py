@@ -1,7 +1,11 @@
 from __future__ import annotations
 from datetime import datetime, time, timedelta
+from functools import lru_cache
 from typing import Optional
 
+import numpy as np
+import pandas as pd
+
 from config.settings import load_settings
 
 _settings = load_settings()
@@ -15,18 +19,34 @@ def _parse_workday_start(s: str) -> time:
         return time(9, 0)
 
 
-def compute_status(check_in_time: Optional[time]) -> str:
+@lru_cache(maxsize=None)
+def late_cutoff(department: Optional[str] = None) -> time:
+    """Latest on-time check-in (workday_start + late_threshold) for a department's schedule."""
+    sched = _settings.department_schedules.get(department, {}) if department else {}
+    start = _parse_workday_start(sched.get("workday_start", _settings.workday_start))
+    minutes = int(sched.get("late_threshold_minutes", _settings.late_threshold_minutes))
+    return (datetime.combine(datetime.today().date(), start) + timedelta(minutes=minutes)).time()
+
+
+def compute_status(check_in_time: Optional[time], department: Optional[str] = None) -> str:
     """Return a simple attendance status based on check-in time.
 
     - On Time: check-in <= workday_start + late_threshold
     - Late:    check-in >  workday_start + late_threshold
     - Unknown: no check-in provided
+
+    ``department`` selects an override from the ``[schedules]`` config table.
     """
     if not check_in_time:
         return "Unknown"
-    start = _parse_workday_start(_settings.workday_start)
-    threshold = (datetime.combine(datetime.today().date(), start) + timedelta(minutes=_settings.late_threshold_minutes)).time()
-    return "On Time" if check_in_time <= threshold else "Late"
+    return "On Time" if check_in_time <= late_cutoff(department) else "Late"
+
+
+def to_local_naive(ts: Optional[datetime]) -> Optional[datetime]:
+    """Server-local naive time for ``ts``; timezone-aware values are converted, naive ones kept as they are."""
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone().replace(tzinfo=None)
 
 
 def total_work_hours(check_in: Optional[datetime], check_out: Optional[datetime]) -> float:
@@ -38,13 +58,22 @@ def total_work_hours(check_in: Optional[datetime], check_out: Optional[datetime]
 
 def status_to_value(status: Optional[str]) -> float:
     """Map attendance status to numeric scale for visualization.
-    Unknown -> 0.1, Late -> 0.5, On Time -> 1.0
+    Absent -> 0.0, Unknown -> 0.1, Late -> 0.5, On Time -> 1.0
     """
     if not status:
         return 0.1
     s = str(status).lower()
+    if s == "absent":
+        return 0.0
     if "on" in s and "time" in s:
         return 1.0
     if "late" in s:
         return 0.5
     return 0.1
+
+
+def encode_statuses(statuses: pd.Series) -> np.ndarray:
+    """Vectorized status_to_value: only the distinct categories go through the Python mapper."""
+    cat = pd.Categorical(statuses)
+    lut = np.array([status_to_value(c) for c in cat.categories] + [status_to_value(None)], dtype=float)
+    return lut[cat.codes]  # code -1 (missing) picks the trailing "unknown" entry
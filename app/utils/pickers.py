@@ -0,0 +1,23 @@
+from __future__ import annotations
+import streamlit as st
+from typing import Optional
+
+from db.database import SessionLocal
+from db.crud import search_employees
+
+
+def employee_picker(label: str, key: str, allow_all: bool = False, limit: int = 20) -> Optional[int]:
+    """Search-as-you-type employee selector; only the top matches are sent to the browser.
+
+    Returns the selected employee_id, or None for "All" / no selection.
+    """
+    query = st.text_input(f"Search {label}", key=f"{key}_query", placeholder="Type a name or email")
+    with SessionLocal() as db:
+        matches = search_employees(db, query, limit=limit)
+    options = {f"{name} ({email})": emp_id for emp_id, name, email in matches}
+    choices = (["All"] if allow_all else []) + list(options.keys())
+    if not choices:
+        st.caption("Type to search employees." if not query else "No matching employees.")
+        return None
+    choice = st.selectbox(label, choices, key=f"{key}_select")
+    return options.get(choice)
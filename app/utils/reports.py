@@ -69,5 +69,27 @@ def generate_pdf_report(
     return buffer.read()
 
 
+def format_kpis(summary: Dict[str, Optional[float]]) -> Dict[str, str]:
+    """Render a crud.kpi_summary dict as display strings (for metrics and the PDF)."""
+    def pct(v):
+        return "n/a" if v is None else f"{v * 100:.1f}%"
+
+    def num(v, fmt="{:.1f}"):
+        return "n/a" if v is None else fmt.format(v)
+
+    return {
+        "Total Tasks": str(summary.get("total_tasks", 0)),
+        "Completed": str(summary.get("completed_tasks", 0)),
+        "In Progress": str(summary.get("in_progress_tasks", 0)),
+        "Pending": str(summary.get("pending_tasks", 0)),
+        "Avg Productivity": num(summary.get("avg_productivity")),
+        "Median Productivity": num(summary.get("p50_productivity")),
+        "P90 Productivity": num(summary.get("p90_productivity")),
+        "Attendance Rate": pct(summary.get("attendance_rate")),
+        "Late Rate": pct(summary.get("late_rate")),
+        "Avg Hours": num(summary.get("avg_hours"), "{:.2f}"),
+    }
+
+
 def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
     return df.to_csv(index=False).encode("utf-8")
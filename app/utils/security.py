@@ -1,10 +1,20 @@
 from __future__ import annotations
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from config.settings import load_settings
+
+_settings = load_settings()
+
+# hashlib's scrypt/pbkdf2 release the GIL, so a small thread pool bounds how many
+# hashes run at once without blocking other sessions' script threads.
+_hash_pool = ThreadPoolExecutor(max_workers=max(_settings.hash_workers, 1), thread_name_prefix="pwhash")
+
 
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    return generate_password_hash(password, method=_settings.password_hash_method)
 
 
 def verify_password(password: str, password_hash: Optional[str]) -> bool:
@@ -14,3 +24,34 @@ def verify_password(password: str, password_hash: Optional[str]) -> bool:
         return check_password_hash(password_hash, password)
     except Exception:
         return False
+
+
+def verify_password_bounded(password: str, password_hash: Optional[str]) -> bool:
+    """verify_password run on the bounded hashing pool."""
+    return _hash_pool.submit(verify_password, password, password_hash).result()
+
+
+def hash_password_bounded(password: str) -> str:
+    return _hash_pool.submit(hash_password, password).result()
+
+
+@lru_cache(maxsize=1)
+def _current_method() -> str:
+    # werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"), so compare
+    # against the prefix it actually writes rather than the configured string
+    return generate_password_hash("x", method=_settings.password_hash_method).split("$", 1)[0]
+
+
+def needs_rehash(password_hash: Optional[str]) -> bool:
+    """True when a stored hash was made with a different method/cost than configured."""
+    if not password_hash:
+        return False
+    return password_hash.split("$", 1)[0] != _current_method()
+
+
+def hash_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+    """Hash many passwords across a process pool (bulk provisioning)."""
+    if len(passwords) < 16:
+        return [hash_password(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(hash_password, passwords, chunksize=max(len(passwords) // 64, 1)))
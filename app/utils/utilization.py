@@ -0,0 +1,120 @@
+"""Per-employee, per-day task time utilization via sort-and-sweep over NumPy arrays.
+
+Tasks are attributed to the day they start and clipped at that day's midnight.
+For each employee-day:
+  - busy_hours:    union of task intervals (overlaps merged)
+  - overlap_hours: time booked more than once (sum of durations - busy)
+  - window_hours:  check-in to check-out from Attendance
+  - idle_hours:    checked-in time not covered by any task
+"""
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+_NS_PER_HOUR = 3600 * 10 ** 9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+_KEYS = ["employee_id", "day"]
+UTILIZATION_COLUMNS = ["employee_id", "day", "busy_hours", "overlap_hours", "window_hours", "idle_hours"]
+
+
+def _ns(values) -> np.ndarray:
+    """Naive timestamps as int64 nanoseconds since the epoch."""
+    return pd.to_datetime(values).to_numpy().astype("datetime64[ns]").astype("int64")
+
+
+def _prepare(df_tasks: pd.DataFrame) -> pd.DataFrame:
+    df = df_tasks.dropna(subset=["start_time", "end_time"])
+    start = _ns(df["start_time"])
+    day = start // _NS_PER_DAY * _NS_PER_DAY
+    end = np.minimum(_ns(df["end_time"]), day + _NS_PER_DAY)
+    out = pd.DataFrame({
+        "employee_id": df["employee_id"].to_numpy(),
+        "day": day,
+        "start": start,
+        "end": end,
+    })
+    out = out[out["end"] > out["start"]]
+    return out.sort_values(["employee_id", "day", "start"], kind="stable").reset_index(drop=True)
+
+
+def merge_intervals(df_tasks: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Merged busy blocks and double-booked intervals.
+
+    Returns (blocks[employee_id, day, start, end], overlaps[employee_id, day, start, end]),
+    with day/start/end as int64 nanoseconds since the epoch.
+    """
+    iv = _prepare(df_tasks)
+    if iv.empty:
+        empty = pd.DataFrame(columns=["employee_id", "day", "start", "end"])
+        return empty, empty.copy()
+    keys = [iv["employee_id"], iv["day"]]
+    run_end = iv.groupby(keys, sort=False)["end"].cummax().to_numpy()
+    prev_end = np.empty_like(run_end)
+    prev_end[1:] = run_end[:-1]
+    same_group = np.zeros(len(iv), dtype=bool)
+    same_group[1:] = (iv["employee_id"].to_numpy()[1:] == iv["employee_id"].to_numpy()[:-1]) & (
+        iv["day"].to_numpy()[1:] == iv["day"].to_numpy()[:-1]
+    )
+    starts = iv["start"].to_numpy()
+    overlapping = same_group & (starts < prev_end)
+    block_id = np.cumsum(~overlapping)
+    blocks = iv.groupby(block_id).agg(employee_id=("employee_id", "first"), day=("day", "first"),
+                                      start=("start", "min"), end=("end", "max")).reset_index(drop=True)
+    ov = iv[overlapping]
+    overlaps = pd.DataFrame({
+        "employee_id": ov["employee_id"].to_numpy(),
+        "day": ov["day"].to_numpy(),
+        "start": ov["start"].to_numpy(),
+        "end": np.minimum(ov["end"].to_numpy(), prev_end[overlapping]),
+    })
+    return blocks, overlaps
+
+
+def _per_day(df: pd.DataFrame, values) -> pd.Series:
+    """Sum of ``values`` per (employee_id, day); empty input keeps the named index so frames still align."""
+    if df.empty:
+        return pd.Series(dtype="int64", index=pd.MultiIndex.from_arrays([[], []], names=_KEYS))
+    index = pd.MultiIndex.from_arrays([df["employee_id"].to_numpy(), df["day"].to_numpy()], names=_KEYS)
+    return pd.Series(np.asarray(values, dtype="int64"), index=index).groupby(level=_KEYS).sum()
+
+
+def compute_utilization(df_tasks: pd.DataFrame, df_att: pd.DataFrame) -> pd.DataFrame:
+    """Utilization per employee-day.
+
+    ``df_tasks``: employee_id, start_time, end_time. ``df_att``: employee_id, date, check_in, check_out.
+    Days with a check-in window but no tasks get a row with all of the window idle.
+    """
+    iv = _prepare(df_tasks)
+    blocks, _ = merge_intervals(df_tasks)
+    booked = _per_day(iv, iv["end"] - iv["start"])
+    busy = _per_day(blocks, blocks["end"] - blocks["start"])
+
+    att = df_att.dropna(subset=["check_in", "check_out"])
+    win = pd.DataFrame({
+        "employee_id": att["employee_id"].to_numpy(),
+        "day": _ns(att["date"]),
+        "w_start": _ns(att["check_in"]),
+        "w_end": _ns(att["check_out"]),
+    })
+    window = _per_day(win, (win["w_end"] - win["w_start"]).clip(lower=0))
+    if blocks.empty or win.empty:
+        busy_in_window = _per_day(win.iloc[:0], [])
+    else:
+        bw = blocks.merge(win, on=_KEYS, how="inner")
+        covered = np.clip(np.minimum(bw["end"], bw["w_end"]) - np.maximum(bw["start"], bw["w_start"]), 0, None)
+        busy_in_window = _per_day(bw, covered)
+
+    out = pd.concat({"booked": booked, "busy": busy, "window": window, "busy_in_window": busy_in_window}, axis=1)
+    if out.empty:
+        return pd.DataFrame(columns=UTILIZATION_COLUMNS)
+    out = out.fillna(0)
+    result = pd.DataFrame({
+        "busy_hours": out["busy"] / _NS_PER_HOUR,
+        "overlap_hours": (out["booked"] - out["busy"]) / _NS_PER_HOUR,
+        "window_hours": out["window"] / _NS_PER_HOUR,
+        "idle_hours": (out["window"] - out["busy_in_window"]).clip(lower=0) / _NS_PER_HOUR,
+    }).reset_index()
+    result["day"] = pd.to_datetime(result["day"].to_numpy().astype("datetime64[ns]")).date
+    return result[UTILIZATION_COLUMNS].sort_values(["day", "employee_id"]).reset_index(drop=True)
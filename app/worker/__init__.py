@@ -0,0 +1 @@
+# Make worker a package
@@ -0,0 +1,123 @@
+"""Background precompute worker.
+
+    python app/worker/jobs.py
+
+Keeps the Dashboard/Reports analytics for the last 7/30/90 days, the rolling
+productivity statistics and the team PDF report warm in db.result_store, and
+runs nightly maintenance. Safe to run several copies: each job is claimed
+through the scheduler's job_runs lease. With tenancy enabled every tenant gets
+its own scheduler, run with that tenant active.
+"""
+from __future__ import annotations
+import logging
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from db import crud, partitioning, result_store
+from db.result_store import analytics_key, report_key
+from db.database import SessionLocal, init_db, tenancy_enabled, tenants, use_tenant
+from db.filters import AnalyticsFilter
+from utils.reports import generate_pdf_report, format_kpis
+from worker.scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_put(key: str, fn):
+    t0 = time.perf_counter()
+    value = fn()
+    result_store.put(key, value, duration_ms=int((time.perf_counter() - t0) * 1000))
+    return value
+
+
+def precompute_analytics():
+    today = date.today()
+    with SessionLocal() as db:
+        for days in result_store.PRECOMPUTED_WINDOWS:
+            flt = AnalyticsFilter(start=today - timedelta(days=days), end=today)
+            _timed_put(analytics_key(days, "dept"), lambda: crud.department_productivity(db, filters=flt))
+            _timed_put(analytics_key(days, "leaderboard"), lambda: crud.leaderboard(db, filters=flt, limit=10))
+            _timed_put(analytics_key(days, "kpis"), lambda: crud.kpi_summary(db, filters=flt))
+
+
+def refresh_productivity_stats():
+    """Rolling stats for the last ROLLING_STATS_DAYS days; after the day's first full run only today is recomputed."""
+    today = date.today()
+    key = analytics_key(result_store.ROLLING_STATS_DAYS, "rolling")
+    hit = result_store.get(key, fresh=False)
+
+    def compute():
+        with SessionLocal() as db:
+            if hit and hit[1].date() == today:
+                previous = hit[0]
+                latest = crud.productivity_rolling(db, today, today)
+                return pd.concat([previous[previous["day"] < today], latest], ignore_index=True)
+            return crud.productivity_rolling(db, today - timedelta(days=result_store.ROLLING_STATS_DAYS), today)
+
+    _timed_put(key, compute)
+
+
+def precompute_reports():
+    """Team PDF for each window, built from the analytics precomputed above (or live if missing)."""
+    today = date.today()
+    with SessionLocal() as db:
+        for days in result_store.PRECOMPUTED_WINDOWS:
+            flt = AnalyticsFilter(start=today - timedelta(days=days), end=today)
+
+            def cached(name, live):
+                hit = result_store.get(analytics_key(days, name))
+                return hit[0] if hit else live()
+
+            df_dept = cached("dept", lambda: crud.department_productivity(db, filters=flt))
+            df_top = cached("leaderboard", lambda: crud.leaderboard(db, filters=flt, limit=10))
+            kpis = cached("kpis", lambda: crud.kpi_summary(db, filters=flt))
+            df_top = df_top.drop(columns=["employee_id"]).round({"avg_score": 1})
+            _timed_put(report_key(days), lambda: generate_pdf_report(
+                title="Team Report",
+                kpis={"Departments": str(len(df_dept)), **format_kpis(kpis)},
+                sections={"Department Productivity": df_dept, "Top Performers": df_top},
+            ))
+
+
+def nightly_maintenance():
+    if partitioning.enabled():
+        partitioning.ensure_future_partitions()
+        partitioning.archive_old_partitions()
+
+
+def build_scheduler() -> Scheduler:
+    sched = Scheduler()
+    sched.register("precompute_analytics", precompute_analytics, every=result_store.ANALYTICS_EVERY)
+    sched.register("refresh_productivity_stats", refresh_productivity_stats, every=result_store.ANALYTICS_EVERY)
+    sched.register("precompute_reports", precompute_reports, every=result_store.REPORTS_EVERY)
+    sched.register("nightly_maintenance", nightly_maintenance, cron="30 2 * * *", run_at_start=False,
+                   lease=timedelta(hours=3))
+    return sched
+
+
+def run_all_tenants(tick_seconds: float = 15.0):
+    """Tick one scheduler per tenant; job_runs leases live in each tenant's schema."""
+    schedulers = {t: build_scheduler() for t in tenants()}
+    while True:
+        for tenant, sched in schedulers.items():
+            with use_tenant(tenant):
+                for name in sched.run_pending():
+                    logger.info("%s: ran %s", tenant, name)
+        time.sleep(tick_seconds)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [worker] %(levelname)s %(message)s")
+    init_db()  # worker.scheduler is imported above, so job_runs is created along with the app tables
+    if tenancy_enabled():
+        run_all_tenants()
+    else:
+        build_scheduler().run_forever()
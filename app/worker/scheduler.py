@@ -0,0 +1,219 @@
+"""Minimal job scheduler with cross-process locking.
+
+Jobs run on a fixed interval or a standard 5-field cron expression. Before
+running, a worker claims the job's row in ``job_runs`` with a conditional UPDATE:
+the lease must be expired or never taken, and ``last_started`` must be at least
+one interval ago (for cron jobs: before the firing being run). So with several
+worker processes each firing runs once, on whichever worker gets there first; a
+crashed worker's lease simply expires.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import Table, Column, DateTime, String, Text, inspect, select, insert, update, or_
+from sqlalchemy.exc import IntegrityError
+
+from db.database import Base, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+job_runs = Table(
+    "job_runs",
+    Base.metadata,
+    Column("job_name", String(100), primary_key=True),
+    Column("locked_until", DateTime, nullable=True),
+    Column("locked_by", String(200), nullable=True),
+    Column("last_started", DateTime, nullable=True),
+    Column("last_finished", DateTime, nullable=True),
+    Column("last_error", Text, nullable=True),
+)
+
+
+# (lowest, highest) value of each cron field; day-of-week accepts 7 as a second Sunday
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_field(spec: str, lo: int, hi: int) -> FrozenSet[int]:
+    """Values matched by one cron field: ``*``, ``n``, ``a-b`` and ``/step`` on any of them, comma-separated."""
+    values = set()
+    for part in spec.split(","):
+        rng, _, step_s = part.partition("/")
+        step = int(step_s) if step_s else 1
+        if rng == "*":
+            first, last = lo, hi
+        elif "-" in rng:
+            first, last = (int(x) for x in rng.split("-", 1))
+        else:
+            first = int(rng)
+            last = hi if step_s else first  # "5/15" means from 5 on, every 15
+        if step < 1 or not lo <= first <= last <= hi:
+            raise ValueError(f"invalid cron field {spec!r} (allowed {lo}-{hi})")
+        values.update(range(first, last + 1, step))
+    return frozenset(values)
+
+
+@lru_cache(maxsize=64)
+def parse_cron(expr: str) -> Tuple[FrozenSet[int], ...]:
+    """Parse ``minute hour day-of-month month day-of-week`` into the sets of values each field matches.
+
+    Day-of-week follows crontab: 0 and 7 are Sunday, 1 is Monday ... 6 Saturday.
+    """
+    parts = expr.split()
+    if len(parts) != 5:
+        raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+    minute, hour, dom, month, dow = (_parse_field(p, lo, hi) for p, (lo, hi) in zip(parts, _CRON_FIELDS))
+    if 7 in dow:
+        dow = (dow - {7}) | {0}
+    return minute, hour, dom, month, dow
+
+
+def cron_matches(expr: str, when: datetime) -> bool:
+    """True when ``when`` (to the minute) is a firing time of ``expr``.
+
+    As in crontab, when both day-of-month and day-of-week are restricted (neither
+    starts with ``*``), a day matching either one fires.
+    """
+    minute, hour, dom, month, dow = parse_cron(expr)
+    if when.minute not in minute or when.hour not in hour or when.month not in month:
+        return False
+    in_dom, in_dow = when.day in dom, (when.weekday() + 1) % 7 in dow
+    _, _, dom_spec, _, dow_spec = expr.split()
+    if dom_spec.startswith("*") or dow_spec.startswith("*"):
+        return in_dom and in_dow
+    return in_dom or in_dow
+
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable[[], None]
+    every: Optional[timedelta] = None
+    cron: Optional[str] = None
+    lease: timedelta = timedelta(minutes=30)
+    run_at_start: bool = True
+    next_run: Optional[datetime] = field(default=None, repr=False)
+
+    def due(self, now: datetime) -> bool:
+        if self.next_run is None:
+            return self.run_at_start or (self.cron is not None and cron_matches(self.cron, now))
+        return now >= self.next_run
+
+    def firing(self, now: datetime) -> datetime:
+        """The cron firing a due run at ``now`` is for: the scheduled minute, else the latest one not after ``now``."""
+        if self.next_run is not None:
+            return self.next_run
+        at = now.replace(second=0, microsecond=0)
+        give_up = at - timedelta(days=5 * 366)
+        while not cron_matches(self.cron, at):
+            at -= timedelta(minutes=1)
+            if at < give_up:
+                return datetime.min
+        return at
+
+    def schedule_next(self, now: datetime):
+        if self.every is not None:
+            self.next_run = now + self.every
+        else:
+            nxt = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            give_up = nxt + timedelta(days=5 * 366)  # covers Feb 29 schedules
+            while not cron_matches(self.cron, nxt):
+                nxt += timedelta(minutes=1)
+                if nxt > give_up:
+                    raise ValueError(f"cron expression never fires: {self.cron!r}")
+            self.next_run = nxt
+
+
+class Scheduler:
+    def __init__(self, tick_seconds: float = 15.0):
+        self.tick_seconds = tick_seconds
+        self.jobs: Dict[str, Job] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def register(self, name: str, fn: Callable[[], None], every: Optional[timedelta] = None,
+                 cron: Optional[str] = None, **kwargs) -> Job:
+        if (every is None) == (cron is None):
+            raise ValueError("a job needs exactly one of every= or cron=")
+        if cron is not None:
+            parse_cron(cron)  # fail at registration, not at the first tick
+        job = Job(name=name, fn=fn, every=every, cron=cron, **kwargs)
+        self.jobs[name] = job
+        return job
+
+    def _claim(self, job: Job, now: datetime) -> bool:
+        """Take the job's lease, unless another worker holds it or has already started this run."""
+        if job.every is not None:
+            not_run = job_runs.c.last_started <= now - job.every
+        else:
+            not_run = job_runs.c.last_started < job.firing(now)
+        with SessionLocal() as db:
+            try:
+                db.execute(insert(job_runs).values(job_name=job.name))
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+            res = db.execute(
+                update(job_runs)
+                .where(job_runs.c.job_name == job.name,
+                       or_(job_runs.c.locked_until.is_(None), job_runs.c.locked_until < now),
+                       or_(job_runs.c.last_started.is_(None), not_run))
+                .values(locked_until=now + job.lease, locked_by=self.worker_id, last_started=now)
+            )
+            db.commit()
+            return res.rowcount == 1
+
+    def _release(self, job: Job, error: Optional[str]):
+        with SessionLocal() as db:
+            db.execute(
+                update(job_runs)
+                .where(job_runs.c.job_name == job.name, job_runs.c.locked_by == self.worker_id)
+                .values(locked_until=None, last_finished=datetime.now(), last_error=error)
+            )
+            db.commit()
+
+    def run_pending(self, now: Optional[datetime] = None) -> List[str]:
+        """Run every due job this worker can claim; returns the names that ran."""
+        now = now or datetime.now()
+        ran = []
+        for job in self.jobs.values():
+            if not job.due(now):
+                continue
+            claimed = self._claim(job, now)
+            job.schedule_next(now)
+            if not claimed:
+                continue
+            error = None
+            try:
+                job.fn()
+            except Exception:
+                error = traceback.format_exc()
+                logger.exception("job %s failed", job.name)
+            self._release(job, error)
+            ran.append(job.name)
+        return ran
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            for name in self.run_pending():
+                logger.info("ran %s", name)
+            self._stop.wait(self.tick_seconds)
+
+    def stop(self):
+        self._stop.set()
+
+
+def job_status() -> List[dict]:
+    """Rows of ``job_runs`` for display (none until a worker has created the table)."""
+    with SessionLocal() as db:
+        if not inspect(db.connection()).has_table("job_runs"):
+            return []
+        return [dict(r._mapping) for r in db.execute(select(job_runs).order_by(job_runs.c.job_name)).all()]
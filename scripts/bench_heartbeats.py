@@ -0,0 +1,50 @@
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Ensure app/ modules are importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(PROJECT_ROOT, "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from db.database import SessionLocal, init_db  # type: ignore
+from db import crud  # type: ignore
+from db.heartbeats import ingest_heartbeats  # type: ignore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure heartbeat ingestion throughput with synthetic events.")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as db:
+        emp_ids = [e.employee_id for e in crud.list_employees(db)]
+    if not emp_ids:
+        print("No employees found. Seed employees first.")
+        return
+
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    t0 = time.perf_counter()
+    sent = 0
+    while sent < args.events:
+        n = min(args.batch, args.events - sent)
+        batch = [
+            (random.choice(emp_ids), start + timedelta(minutes=random.randrange(8 * 60)), random.random() < 0.8)
+            for _ in range(n)
+        ]
+        ingest_heartbeats(batch)
+        sent += n
+    elapsed = time.perf_counter() - t0
+    print(f"Ingested events={sent} in {elapsed:.2f}s ({sent / elapsed:,.0f} events/s)")
+
+
+if __name__ == "__main__":
+    random.seed(305)
+    main()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, n: int, employee_ids: list[int], latencies: list[float], errors: list[int]):
+    for _ in range(n):
+        emp = random.choice(employee_ids)
+        path = random.choice(["/attendance/check-in", "/attendance/check-out"])
+        t0 = time.perf_counter()
+        try:
+            r = await client.post(path, json={"employee_id": emp, "when": datetime.now().isoformat()})
+            if r.status_code >= 400:
+                errors.append(r.status_code)
+        except httpx.HTTPError:
+            errors.append(0)
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run(args):
+    headers = {"X-API-Key": args.api_key} if args.api_key else {}
+    if args.tenant:
+        headers["X-Tenant"] = args.tenant
+    limits = httpx.Limits(max_connections=args.concurrency)
+    latencies: list[float] = []
+    errors: list[int] = []
+    employee_ids = list(range(args.first_employee, args.first_employee + args.employees))
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=30) as client:
+        # spread the remainder so exactly args.requests are sent, even when fewer than the concurrency
+        base, extra = divmod(args.requests, args.concurrency)
+        shares = [base + (i < extra) for i in range(args.concurrency)]
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client, n, employee_ids, latencies, errors) for n in shares if n))
+        elapsed = time.perf_counter() - t0
+    if not latencies:
+        print("no requests sent")
+        return
+    latencies.sort()
+    p = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000  # noqa: E731
+    print(f"requests={len(latencies)} errors={len(errors)} elapsed={elapsed:.2f}s")
+    print(f"throughput={len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency ms: mean={statistics.mean(latencies) * 1000:.1f} p50={p(0.50):.1f} p95={p(0.95):.1f} p99={p(0.99):.1f}")
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load test for the ingestion API (check-in/check-out).")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--tenant", default="", help="X-Tenant header when the API runs with tenancy enabled")
+    parser.add_argument("--requests", type=_positive_int, default=5000)
+    parser.add_argument("--concurrency", type=_positive_int, default=50)
+    parser.add_argument("--employees", type=int, default=10, help="employee ids to spread writes over")
+    parser.add_argument("--first-employee", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    random.seed(305)
+    main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+from datetime import date
+
+# Ensure app/ modules are importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(PROJECT_ROOT, "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from db.database import init_db, tenancy_enabled, tenants, use_tenant  # type: ignore
+from db import partitioning  # type: ignore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions of attendance and tasks.")
+    parser.add_argument("--tenant", help="only this tenant (default: every tenant when tenancy is enabled)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("convert", help="one-off: convert attendance and tasks to partitioned tables (locks them)")
+    sub.add_parser("maintain", help="create future partitions and archive expired ones")
+    restore = sub.add_parser("restore", help="restore an archived month")
+    restore.add_argument("table", choices=sorted(partitioning.PARTITIONED))
+    restore.add_argument("month", help="YYYY-MM")
+    args = parser.parse_args()
+
+    if not partitioning.enabled():
+        print("Partitioning is disabled (set [partitioning] enabled = true on PostgreSQL).")
+        return
+    init_db()
+    if args.cmd == "restore" and tenancy_enabled() and not args.tenant:
+        parser.error("restore needs --tenant when tenancy is enabled")
+    targets = [args.tenant] if args.tenant else (tenants() if tenancy_enabled() else [None])
+    for tenant in targets:
+        with use_tenant(tenant):
+            if args.cmd == "convert":
+                for table in partitioning.PARTITIONED:
+                    try:
+                        converted = partitioning.convert_to_partitioned(table)
+                    except ValueError as e:
+                        print(f"Skipped {table}: {e}")
+                        continue
+                    print(f"Converted {table}" if converted else f"{table} is already partitioned")
+            elif args.cmd == "maintain":
+                partitioning.ensure_future_partitions()
+                for path in partitioning.archive_old_partitions():
+                    print(f"Archived {path}")
+            else:
+                y, m = args.month.split("-")
+                rows = partitioning.restore_partition(args.table, date(int(y), int(m), 1))
+                print(f"Restored {args.table} {args.month} rows={rows}")
+    if args.cmd == "convert":
+        init_db()  # recreate the secondary indexes and create the upcoming months
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+# Ensure app/ modules are importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(PROJECT_ROOT, "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from db.database import SessionLocal, init_db, tenancy_enabled, tenants, use_tenant  # type: ignore
+from db import crud  # type: ignore
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute attendance status after workday rules change.")
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today() - timedelta(days=365))
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--chunk-days", type=_positive_int, default=7)
+    parser.add_argument("--tenant", help="only this tenant (default: every tenant when tenancy is enabled)")
+    args = parser.parse_args()
+
+    init_db()
+
+    def report(lo: date, hi: date, updated: int):
+        done = (hi - args.start).days + 1
+        span = (args.end - args.start).days + 1
+        print(f"[{done / span:6.1%}] {lo} .. {hi}: updated={updated}")
+
+    targets = [args.tenant] if args.tenant else (tenants() if tenancy_enabled() else [None])
+    for tenant in targets:
+        with use_tenant(tenant), SessionLocal() as db:
+            if tenant:
+                print(f"Tenant {tenant}")
+            total = crud.recompute_attendance_status(db, args.start, args.end, chunk_days=args.chunk_days, progress=report)
+            print(f"Recomputed attendance status updated={total}")
+
+
+if __name__ == "__main__":
+    main()
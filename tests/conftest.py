@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules import each other as top-level packages (db, utils, worker), as under `streamlit run app/Home.py`.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+# Unit tests never touch the database; db.database only needs a URL it can build an engine for.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
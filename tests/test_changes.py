@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("db.models", reason="needs the application models")
+
+from db.changes import Watermark  # noqa: E402
+
+
+@pytest.mark.parametrize("at", [
+    datetime(2024, 3, 1, 9, 30),
+    datetime(2024, 3, 1, 9, 30, 5, 123456),
+    datetime(1999, 12, 31, 23, 59, 59),
+])
+def test_watermark_round_trip(at):
+    wm = Watermark(at, 42)
+    assert Watermark.decode(wm.encode()) == wm
+
+
+def test_watermark_empty_token_is_start_of_feed():
+    assert Watermark.decode(None) is None
+    assert Watermark.decode("") is None
+
+
+@pytest.mark.parametrize("token", ["garbage", "2024-03-01T09:30:00", "2024-03-01T09:30:00~x", "nope~7"])
+def test_watermark_rejects_malformed_tokens(token):
+    with pytest.raises(ValueError):
+        Watermark.decode(token)
+
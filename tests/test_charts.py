@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from utils.charts import lttb_indices
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 10), (1000, 37), (5000, 500), (11, 10)])
+def test_lttb_keeps_endpoints_and_bucket_count(n, threshold):
+    x = np.arange(n)
+    y = np.sin(x / 7.0)
+    idx = lttb_indices(x, y, threshold)
+    assert len(idx) == threshold
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize("n, threshold", [(5, 5), (5, 10), (50, 2), (50, 0)])
+def test_lttb_returns_all_points_when_not_reducing(n, threshold):
+    x = np.arange(n)
+    assert lttb_indices(x, x * 2.0, threshold).tolist() == list(range(n))
+
+
+def test_lttb_keeps_spike():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[613] = 50.0
+    assert 613 in lttb_indices(x, y, 20)
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from utils.figure_cache import FigureCache, estimate_size, fingerprint
+
+
+def test_estimate_size_counts_array_buffers():
+    small = estimate_size({"data": [{"x": np.arange(10), "y": np.zeros(10)}]})
+    large = estimate_size({"data": [{"x": np.arange(10_000), "y": np.zeros(10_000)}]})
+    assert large - small == 2 * 9_990 * 8
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    cache = FigureCache(max_bytes=100)
+    cache.put("a", "fig-a", 60)
+    cache.put("b", "fig-b", 30)
+    assert cache.get("a") == "fig-a"
+    cache.put("c", "fig-c", 30)
+    assert cache.get("b") is None
+    assert cache.get("a") == "fig-a" and cache.get("c") == "fig-c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_fingerprint_handles_unhashable_cells():
+    df = pd.DataFrame({"tags": [["a", "b"], ["c"]]})
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(pd.DataFrame({"tags": [["a"], ["c"]]}))
@@ -0,0 +1,37 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("db.models", reason="needs the application models")
+
+from db.filters import AnalyticsFilter  # noqa: E402
+
+
+def test_narrow_sets_unrestricted_fields():
+    f = AnalyticsFilter().narrow(department_id=3, employee_id=7, status="Completed")
+    assert f.department_ids == (3,)
+    assert f.employee_ids == (7,)
+    assert f.task_status == ("Completed",)
+
+
+def test_narrow_intersects_existing_selection():
+    f = AnalyticsFilter(department_ids=(1, 2), employee_ids=(5, 6))
+    assert f.narrow(department_id=2).department_ids == (2,)
+    assert f.narrow(employee_id=6).employee_ids == (6,)
+
+
+def test_narrow_outside_selection_matches_nothing():
+    f = AnalyticsFilter(department_ids=(1, 2)).narrow(department_id=3)
+    assert f.department_ids == ()
+    assert len(f.employee_clauses()) == 1
+
+
+def test_narrow_replaces_date_range():
+    f = AnalyticsFilter(start=date(2024, 3, 1), end=date(2024, 3, 31))
+    g = f.narrow(start=date(2024, 2, 1))
+    assert (g.start, g.end) == (date(2024, 2, 1), date(2024, 3, 31))
+
+
+def test_task_clauses_filter_employee_ids_on_tasks_only():
+    clauses = AnalyticsFilter(employee_ids=(4,)).task_clauses()
+    assert [c.left.table.name for c in clauses] == ["tasks"]
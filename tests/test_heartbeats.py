@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("db.models", reason="needs the application models")
+
+from db import heartbeats  # noqa: E402
+from db.heartbeats import HeartbeatBuffer, _bitmaps  # noqa: E402
+
+
+def test_bitmaps_accept_mixed_naive_and_aware_timestamps():
+    local = datetime(2024, 3, 4, 9, 30)
+    aware = local.astimezone().astimezone(timezone(timedelta(hours=-5)))
+    rows = _bitmaps(pd.DataFrame({"employee_id": [1, 1], "ts": [local, aware], "active": [True, False]}, dtype=object))
+    assert len(rows) == 1
+    assert rows.loc[0, "day"] == local.date()
+    assert rows.loc[0, "online"][9 * 60 + 30] == "1"
+    assert rows.loc[0, "online"].count("1") == 1
+
+
+def test_buffer_drops_batches_that_cannot_be_stored(monkeypatch):
+    def fail(batch):
+        raise ValueError("bad event")
+
+    monkeypatch.setattr(heartbeats, "ingest_heartbeats", fail)
+    buf = HeartbeatBuffer(max_events=2, max_age=60)
+    try:
+        buf.extend([(1, datetime(2024, 3, 4, 9), True)] * 2)
+        assert buf.dropped == 2
+        buf.add(1, datetime(2024, 3, 4, 9, 1))
+        assert buf._pending == [(1, datetime(2024, 3, 4, 9, 1), True)]
+    finally:
+        monkeypatch.setattr(heartbeats, "ingest_heartbeats", lambda batch: len(batch))
+        buf.close()
+
+
+def test_buffer_keeps_batch_on_lost_connection_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(heartbeats, "_connection_lost", lambda e: True)
+
+    def down(batch):
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(heartbeats, "ingest_heartbeats", down)
+    buf = HeartbeatBuffer(max_events=2, max_pending=3, max_age=60)
+    try:
+        buf.extend([(i, datetime(2024, 3, 4, 9), True) for i in range(5)])
+        assert [e[0] for e in buf._pending] == [2, 3, 4]
+        assert buf.dropped == 2
+    finally:
+        monkeypatch.setattr(heartbeats, "ingest_heartbeats", lambda batch: len(batch))
+        buf.close()
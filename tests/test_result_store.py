@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from db import result_store
+from db.result_store import _decode, _encode, is_fresh
+
+NOW = datetime(2024, 3, 4, 12, 0)
+
+
+class _Clock(datetime):
+    at = NOW
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.at
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(_Clock, "at", NOW)
+    monkeypatch.setattr(result_store, "datetime", _Clock)
+
+
+def test_recent_result_is_fresh():
+    assert is_fresh(result_store.analytics_key(30, "kpis"), NOW - timedelta(minutes=9))
+
+
+def test_result_older_than_two_intervals_is_stale():
+    assert not is_fresh(result_store.analytics_key(30, "kpis"), NOW - timedelta(minutes=11))
+    assert is_fresh(result_store.report_key(30), NOW - timedelta(minutes=29))
+    assert not is_fresh(result_store.report_key(30), NOW - timedelta(minutes=31))
+
+
+def test_result_from_yesterday_is_stale(monkeypatch):
+    monkeypatch.setattr(_Clock, "at", datetime(2024, 3, 4, 0, 2))
+    assert not is_fresh(result_store.analytics_key(7, "dept"), datetime(2024, 3, 3, 23, 59))
+
+
+@pytest.mark.parametrize("value", [
+    {"total_tasks": 3, "attendance_rate": 0.5},
+    b"%PDF-1.4 ...",
+    pd.DataFrame({"day": pd.to_datetime(["2024-03-01", "2024-03-02"]), "score": [1.5, 2.0]}),
+])
+def test_payload_round_trip(value):
+    out = _decode(_encode(value))
+    if isinstance(value, pd.DataFrame):
+        pd.testing.assert_frame_equal(out, value)
+    else:
+        assert out == value
+
+
+def test_unknown_payload_format_is_rejected():
+    with pytest.raises(ValueError):
+        _decode(b"\x80\x04pickled")
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from worker.scheduler import Job, Scheduler, cron_matches, parse_cron
+
+# 2024-01-07 is a Sunday
+SUN, MON, FRI, SAT = datetime(2024, 1, 7, 9, 0), datetime(2024, 1, 8, 9, 0), datetime(2024, 1, 5, 9, 0), datetime(2024, 1, 6, 9, 0)
+
+
+def test_parse_cron_fields():
+    minute, hour, dom, month, dow = parse_cron("*/15 9-17 1,15 * 1-5")
+    assert minute == {0, 15, 30, 45}
+    assert hour == set(range(9, 18))
+    assert dom == {1, 15}
+    assert month == set(range(1, 13))
+    assert dow == {1, 2, 3, 4, 5}
+
+
+def test_step_on_star_starts_at_field_minimum():
+    _, _, dom, month, _ = parse_cron("0 0 */10 */5 *")
+    assert dom == {1, 11, 21, 31}
+    assert month == {1, 6, 11}
+
+
+def test_step_from_single_value():
+    minute, *_ = parse_cron("5/20 * * * *")
+    assert minute == {5, 25, 45}
+
+
+@pytest.mark.parametrize("dow", ["0", "7"])
+def test_sunday_is_zero_or_seven(dow):
+    expr = f"0 9 * * {dow}"
+    assert cron_matches(expr, SUN)
+    assert not cron_matches(expr, MON)
+    assert not cron_matches(expr, SAT)
+
+
+def test_monday_is_one():
+    assert cron_matches("0 9 * * 1", MON)
+    assert not cron_matches("0 9 * * 1", SUN)
+
+
+def test_weekday_range_skips_the_weekend():
+    assert cron_matches("0 9 * * 1-5", FRI)
+    assert not cron_matches("0 9 * * 1-5", SAT)
+    assert not cron_matches("0 9 * * 1-5", SUN)
+
+
+def test_range_ending_in_seven_includes_sunday():
+    assert cron_matches("0 9 * * 5-7", SUN)
+    assert cron_matches("0 9 * * 5-7", SAT)
+    assert not cron_matches("0 9 * * 5-7", MON)
+
+
+def test_minute_and_hour_must_match():
+    assert cron_matches("30 2 * * *", datetime(2024, 1, 7, 2, 30))
+    assert not cron_matches("30 2 * * *", datetime(2024, 1, 7, 2, 31))
+    assert not cron_matches("30 2 * * *", datetime(2024, 1, 7, 3, 30))
+
+
+def test_restricted_day_of_month_and_week_match_either():
+    expr = "0 9 13 * 5"  # the 13th, or any Friday
+    assert cron_matches(expr, FRI)
+    assert cron_matches(expr, datetime(2024, 1, 13, 9, 0))  # a Saturday
+    assert not cron_matches(expr, SAT)
+
+
+def test_day_of_month_alone_ignores_weekday():
+    assert cron_matches("0 9 5 * *", FRI)
+    assert not cron_matches("0 9 6 * *", FRI)
+
+
+@pytest.mark.parametrize("expr", [
+    "* * * *",
+    "* * * * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "*/0 * * * *",
+    "5-1 * * * *",
+    "a * * * *",
+    "1,,2 * * * *",
+])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        parse_cron(expr)
+
+
+def test_register_rejects_bad_cron():
+    with pytest.raises(ValueError):
+        Scheduler().register("bad", lambda: None, cron="61 * * * *")
+
+
+def test_schedule_next_finds_following_firing():
+    job = Job(name="weekly", fn=lambda: None, cron="0 9 * * 1")
+    job.schedule_next(SUN)
+    assert job.next_run == MON
+    job.schedule_next(MON)
+    assert job.next_run == MON + timedelta(days=7)
+
+
+def test_interval_job():
+    job = Job(name="often", fn=lambda: None, every=timedelta(minutes=5))
+    assert job.due(SUN)  # run_at_start
+    job.schedule_next(SUN)
+    assert not job.due(SUN + timedelta(minutes=4))
+    assert job.due(SUN + timedelta(minutes=5))
+
+
+@pytest.fixture
+def job_runs_db(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from worker import scheduler
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    scheduler.job_runs.create(engine)
+    monkeypatch.setattr(scheduler, "SessionLocal", sessionmaker(bind=engine))
+    yield
+    engine.dispose()
+
+
+def _workers(n, runs, **job):
+    workers = []
+    for i in range(n):
+        w = Scheduler()
+        w.worker_id = f"w{i}"
+        w.register("job", lambda i=i: runs.append(i), **job)
+        workers.append(w)
+    return workers
+
+
+def _tick_all(workers, start, until, step=timedelta(seconds=15)):
+    now = start
+    while now < until:
+        for i, w in enumerate(workers):
+            w.run_pending(now + timedelta(seconds=i))  # workers tick a little apart
+        now += step
+
+
+def test_interval_job_runs_once_per_interval_across_workers(job_runs_db):
+    runs = []
+    _tick_all(_workers(2, runs, every=timedelta(minutes=5)), SUN, SUN + timedelta(minutes=30))
+    assert len(runs) == 6
+
+
+def test_nightly_cron_job_runs_once_per_night_across_workers(job_runs_db):
+    runs = []
+    start = datetime(2024, 1, 7, 2, 0)
+    _tick_all(_workers(2, runs, cron="30 2 * * *", run_at_start=False), start, start + timedelta(hours=2))
+    assert len(runs) == 1
@@ -0,0 +1,105 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from utils.utilization import UTILIZATION_COLUMNS, compute_utilization, merge_intervals
+
+TASK_COLUMNS = ["employee_id", "start_time", "end_time"]
+ATT_COLUMNS = ["employee_id", "date", "check_in", "check_out"]
+DAY = date(2024, 1, 2)
+
+
+def _at(hour, minute=0):
+    return datetime(2024, 1, 2, hour, minute)
+
+
+def _tasks(*rows):
+    return pd.DataFrame(list(rows), columns=TASK_COLUMNS)
+
+
+def _att(*rows):
+    return pd.DataFrame(list(rows), columns=ATT_COLUMNS)
+
+
+def _row(df, employee_id):
+    return df[df["employee_id"] == employee_id].iloc[0]
+
+
+def test_merge_intervals_merges_overlapping_and_keeps_gaps():
+    blocks, overlaps = merge_intervals(_tasks(
+        (1, _at(9), _at(11)),
+        (1, _at(10), _at(12)),
+        (1, _at(10, 30), _at(10, 45)),  # nested inside the first block
+        (1, _at(14), _at(15)),
+    ))
+    assert len(blocks) == 2
+    hours = (blocks["end"] - blocks["start"]) / 3600e9
+    assert hours.tolist() == [3.0, 1.0]
+    assert ((overlaps["end"] - overlaps["start"]) / 3600e9).sum() == pytest.approx(1.25)
+
+
+def test_merge_intervals_keeps_employees_apart():
+    blocks, overlaps = merge_intervals(_tasks((1, _at(9), _at(11)), (2, _at(10), _at(12))))
+    assert len(blocks) == 2
+    assert overlaps.empty
+
+
+def test_task_running_past_midnight_is_clipped_to_its_start_day():
+    df = compute_utilization(_tasks((1, _at(22), datetime(2024, 1, 3, 2))), _att())
+    assert len(df) == 1
+    assert df.loc[0, "day"] == DAY
+    assert df.loc[0, "busy_hours"] == pytest.approx(2.0)
+
+
+def test_busy_overlap_and_idle_hours():
+    df = compute_utilization(
+        _tasks((1, _at(9), _at(11)), (1, _at(10), _at(12)), (1, _at(7), _at(9))),
+        _att((1, DAY, _at(8), _at(17))),
+    )
+    row = _row(df, 1)
+    assert row["busy_hours"] == pytest.approx(5.0)
+    assert row["overlap_hours"] == pytest.approx(1.0)
+    assert row["window_hours"] == pytest.approx(9.0)
+    # 07:00-08:00 is outside the window, so only 08:00-12:00 counts against it
+    assert row["idle_hours"] == pytest.approx(5.0)
+
+
+def test_tasks_without_attendance():
+    df = compute_utilization(_tasks((1, _at(9), _at(11))), _att())
+    assert list(df.columns) == UTILIZATION_COLUMNS
+    row = _row(df, 1)
+    assert row["day"] == DAY
+    assert row["busy_hours"] == pytest.approx(2.0)
+    assert row["window_hours"] == 0
+    assert row["idle_hours"] == 0
+
+
+def test_attendance_without_tasks_is_all_idle():
+    df = compute_utilization(_tasks(), _att((2, DAY, _at(9), _at(13))))
+    row = _row(df, 2)
+    assert row["day"] == DAY
+    assert row["busy_hours"] == 0
+    assert row["window_hours"] == pytest.approx(4.0)
+    assert row["idle_hours"] == pytest.approx(4.0)
+
+
+def test_checked_in_employee_without_tasks_gets_idle_row_alongside_others():
+    df = compute_utilization(
+        _tasks((1, _at(9), _at(10))),
+        _att((1, DAY, _at(9), _at(17)), (2, DAY, _at(9), _at(13))),
+    )
+    assert sorted(df["employee_id"]) == [1, 2]
+    assert _row(df, 1)["idle_hours"] == pytest.approx(7.0)
+    assert _row(df, 2)["idle_hours"] == pytest.approx(4.0)
+
+
+def test_open_attendance_rows_are_ignored():
+    df = compute_utilization(_tasks(), _att((1, DAY, _at(9), None)))
+    assert df.empty
+
+
+def test_no_input():
+    df = compute_utilization(_tasks(), _att())
+    assert df.empty
+    assert list(df.columns) == UTILIZATION_COLUMNS